@@ -2,6 +2,17 @@
 
 import streamlit as st
 from stages import Stage
+from agent.transcript import MESSAGE_STORE
+from agent.education import find_programmes
+from agent.budget import get_budget_status
+from agent.graph import end_profiling_thread
+from agent.coalescing import COALESCER
+from helpers import (
+    PROFILING_INTRO,
+    enter_recommendation_stage,
+    get_session_memory_bytes,
+    show_more_recommendations,
+)
 
 
 def get_active_button_style(text: str) -> str:
@@ -59,7 +70,8 @@ def left_sidebar_controls():
             help="Click to switch to job recommendations",
         ):
             st.session_state.stage = Stage.JOB_RECOMMENDATION
-            st.session_state.graph_state["do_profiling"] = False
+            with st.spinner("Finding job roles..."):
+                enter_recommendation_stage()
             st.rerun()
 
     if current_stage == Stage.JOB_RESEARCH:
@@ -80,18 +92,23 @@ def left_sidebar_controls():
 
     if st.button("🔄 Reset Conversation", use_container_width=True, type="secondary"):
         # Reset to welcome screen
+        MESSAGE_STORE.clear(st.session_state.session_id)
+        end_profiling_thread(st.session_state.session_id)
         for key in [
             "graph_state",
-            "chat_history",
             "stage",
             "pending_questions",
             "app_started",
             "processing",
+            "thread_id",
+            "api_message_count",
         ]:
             if key in st.session_state:
                 del st.session_state[key]
         st.experimental_rerun()
 
+    st.caption(f"Session memory: {get_session_memory_bytes() / 1024:.1f} KB")
+
 
 def get_profile_sidebar():
     st.markdown("#### 📋 Profile Information")
@@ -143,6 +160,13 @@ def get_profile_sidebar():
     )
     st.progress(progress)
 
+    llm_calls_avoided = st.session_state.graph_state.get("llm_calls_avoided")
+    if llm_calls_avoided:
+        st.caption(f"⚡ {llm_calls_avoided} LLM calls avoided this session")
+    coalesced = COALESCER.report()["coalesced"]
+    if coalesced:
+        st.caption(f"🔗 {coalesced} identical LLM requests shared a call")
+
     # Show pending questions if any
     if st.session_state.pending_questions:
         st.divider()
@@ -153,26 +177,46 @@ def get_profile_sidebar():
             st.write(f"... and {len(st.session_state.pending_questions) - 3} more")
 
 
+def prune_selected_jobs():
+    """Deselect jobs that were dropped from the recommendations."""
+    # Roles go stale when the profile changes, hidden selections would still
+    # count towards the limit of 3
+    recommendations = st.session_state.graph_state.get("job_recommendations") or {}
+    st.session_state.selected_jobs = [
+        job_id
+        for job_id in st.session_state.get("selected_jobs", [])
+        if job_id in recommendations
+    ]
+
+
+def toggle_job_selection(job_id: str):
+    """Select or deselect a job by id, allowing at most 3 selected jobs."""
+    prune_selected_jobs()
+    if job_id in st.session_state.selected_jobs:
+        st.session_state.selected_jobs.remove(job_id)
+    elif len(st.session_state.selected_jobs) < 3:
+        st.session_state.selected_jobs.append(job_id)
+
+
 def get_job_recommendation_sidebar():
     st.markdown("#### 💼 Job Recommendations")
 
     # Initialize session state for job selection
-    if "selected_jobs" not in st.session_state:
-        st.session_state.selected_jobs = []
+    prune_selected_jobs()
 
-    # Get job data
-    job_roles = st.session_state.graph_state.get("job_role", [])
-    job_descriptions = st.session_state.graph_state.get("job_role_description", [])
-    education_info = st.session_state.graph_state.get("education", [])
-    profile_match = st.session_state.graph_state.get("profile_match", [])
+    # Recommendation records keyed by job id
+    recommendations = st.session_state.graph_state.get("job_recommendations") or {}
 
     # Show recommendation summary if available
-    if job_roles:
+    if recommendations:
         # Explore all jobs button
         if st.button("🔍 Explore All Jobs", use_container_width=True):
-            show_job_explorer_modal(
-                job_roles, job_descriptions, education_info, profile_match
-            )
+            show_job_explorer_modal(recommendations)
+
+        if st.button("➕ Show More Jobs", use_container_width=True):
+            with st.spinner("Finding more job roles..."):
+                show_more_recommendations()
+            st.rerun()
 
         st.divider()
 
@@ -180,19 +224,20 @@ def get_job_recommendation_sidebar():
         if st.session_state.get("selected_jobs"):
             st.divider()
             st.markdown("**Your Selected Jobs:**")
-            for job in st.session_state.selected_jobs:
-                st.write(f"✓ {job}")
+            for job_id in st.session_state.selected_jobs:
+                if job_id in recommendations:
+                    st.write(f"✓ {recommendations[job_id]['job_role']}")
             st.success(f"{len(st.session_state.selected_jobs)}/3 jobs selected")
-        elif job_roles:
+        else:
             st.info("No jobs selected yet. Click on job titles above to select them.")
 
         st.divider()
         st.markdown("**Select Jobs (Max 3):**")
 
         # Job selection buttons
-        for i, job_title in enumerate(job_roles):
+        for job_id, record in recommendations.items():
             # Check if job is selected and if we can still select more
-            is_selected = job_title in st.session_state.selected_jobs
+            is_selected = job_id in st.session_state.selected_jobs
             can_select = len(st.session_state.selected_jobs) < 3 or is_selected
 
             # Button styling based on selection state
@@ -200,17 +245,14 @@ def get_job_recommendation_sidebar():
             disabled = not can_select
 
             if st.button(
-                f"{'✓ ' if is_selected else ''}{job_title}",
-                key=f"sidebar_job_select_{i}",
+                f"{'✓ ' if is_selected else ''}{record['job_role']}",
+                key=f"sidebar_job_select_{job_id}",
                 disabled=disabled,
                 type=button_type,
                 use_container_width=True,
                 help="Click to select/deselect this job",
             ):
-                if is_selected:
-                    st.session_state.selected_jobs.remove(job_title)
-                else:
-                    st.session_state.selected_jobs.append(job_title)
+                toggle_job_selection(job_id)
                 st.rerun()
 
 
@@ -237,20 +279,21 @@ def get_profile_display():
         "Proceed to Job Recommendations", type="primary", use_container_width=True
     ):
         st.session_state.stage = Stage.JOB_RECOMMENDATION
+        with st.spinner("Finding job roles..."):
+            enter_recommendation_stage()
         st.rerun()
 
 
 def get_job_recommendations_display():
     """Display job recommendations in the main area."""
 
-    # Initialize selected_jobs if not exists
-    if "selected_jobs" not in st.session_state:
-        st.session_state.selected_jobs = []
+    # Initialize selected_jobs, without jobs that are no longer recommended
+    prune_selected_jobs()
 
     # Get job data
-    job_roles = st.session_state.graph_state.get("job_role", [])
+    recommendations = st.session_state.graph_state.get("job_recommendations")
 
-    if job_roles:
+    if recommendations:
         st.markdown("### Job Recommendations Ready!")
         st.write(
             "Your personalized job recommendations are available in the right panel."
@@ -287,6 +330,33 @@ def right_sidebar_controls():
     elif st.session_state.stage == Stage.JOB_RECOMMENDATION:
         get_job_recommendation_sidebar()
 
+    get_token_budget_sidebar()
+
+
+BUDGET_STEP_LABELS = {
+    "cheaper_model": "Using a cheaper model",
+    "short_history": "Shorter conversation history",
+    "no_new_questions": "No new follow-up questions",
+}
+
+
+def get_token_budget_sidebar():
+    """Show how much of the token budget the session has used."""
+    status = get_budget_status(st.session_state.graph_state)
+    session = status["session"]
+
+    st.divider()
+    st.markdown("#### 🪙 Token Budget")
+    st.progress(min(status["used"], 1.0))
+    st.caption(
+        f"{session['input_tokens']:,} prompt and {session['output_tokens']:,} "
+        "completion tokens used this session"
+    )
+    if status["used"] >= 1.0:
+        st.warning("The token budget is used up, answers are limited.")
+    for step in status["steps"]:
+        st.caption(f"⬇️ {BUDGET_STEP_LABELS[step]}")
+
 
 def welcome_screen():
     """Display welcome screen with intro text and start button."""
@@ -316,73 +386,91 @@ def chat_interface():
     """Render the chat interface."""
     # Create scrollable chat container with fixed height
     with st.container(height=600):
-        # Display existing chat
-        for message in st.session_state.chat_history:
-            if message["role"] == "user":
-                st.chat_message("user").write(message["content"])
+        if st.session_state.intro_shown:
+            st.chat_message("assistant").write(PROFILING_INTRO)
+
+        # Display existing chat, older messages are streamed from the archive
+        for message in MESSAGE_STORE.iter_history(st.session_state.session_id):
+            if message.role == "user":
+                st.chat_message("user").write(message.content)
             else:
-                st.chat_message("assistant").write(message["content"])
+                st.chat_message("assistant").write(message.content)
+
+        # The last turn ran out of time and answered with what it had
+        if st.session_state.graph_state.get("degraded"):
+            st.caption(
+                "⏱️ This answer was limited because it took too long or the "
+                "token budget ran out. Send another message to try again."
+            )
 
 
 @st.dialog("Job Explorer")
-def show_job_explorer_modal(job_roles, job_descriptions, education_info, profile_match):
+def show_job_explorer_modal(recommendations: dict[str, dict]):
     """Show modal with detailed job cards in horizontal scroll."""
     st.markdown("### Explore All Recommended Jobs")
 
     # Create tabs for each job for horizontal navigation
-    if job_roles:
+    if recommendations:
+        records = list(recommendations.values())
         tabs = st.tabs(
             [
-                f"Job {i + 1}: {role[:20]}..."
-                if len(role) > 20
-                else f"Job {i + 1}: {role}"
-                for i, role in enumerate(job_roles)
+                f"Job {i + 1}: {record['job_role'][:20]}..."
+                if len(record["job_role"]) > 20
+                else f"Job {i + 1}: {record['job_role']}"
+                for i, record in enumerate(records)
             ]
         )
 
-        for i, tab in enumerate(tabs):
+        for tab, record in zip(tabs, records):
             with tab:
-                if i < len(job_roles):
-                    # Job card content
-                    st.markdown(f"## {job_roles[i]}")
-
-                    col1, col2 = st.columns([2, 1])
-
-                    with col1:
-                        # Job description
-                        if i < len(job_descriptions) and job_descriptions[i]:
-                            st.markdown("### Description")
-                            st.write(job_descriptions[i])
-
-                        # Education requirements
-                        if i < len(education_info) and education_info[i]:
-                            st.markdown("### Education & Skills")
-                            st.write(education_info[i])
-
-                    with col2:
-                        # Profile match
-                        if i < len(profile_match) and profile_match[i]:
-                            st.markdown("### Why This Matches You")
-                            st.info(profile_match[i])
-
-                        # Quick select button
-                        job_title = job_roles[i]
-                        is_selected = job_title in st.session_state.selected_jobs
-                        can_select = (
-                            len(st.session_state.selected_jobs) < 3 or is_selected
+                # Job card content
+                st.markdown(f"## {record['job_role']}")
+
+                col1, col2 = st.columns([2, 1])
+
+                with col1:
+                    # Job description
+                    if record.get("job_role_description"):
+                        st.markdown("### Description")
+                        st.write(record["job_role_description"])
+
+                    # Education requirements, looked up in the programme index
+                    # when the recommendation has none
+                    if record.get("education"):
+                        st.markdown("### Education & Skills")
+                        st.write(record["education"])
+                    elif programmes := find_programmes(record["job_role"]):
+                        st.markdown("### Education & Skills")
+                        for programme in programmes:
+                            st.markdown(
+                                f"- **{programme['name']}** ({programme['level']}, "
+                                f"{programme['duration']}): {programme['description']}"
+                            )
+                    else:
+                        st.markdown("### Education & Skills")
+                        st.caption(
+                            "No programme in the education database leads to this role."
                         )
 
-                        if st.button(
-                            f"{'✓ Selected' if is_selected else 'Select Job'}",
-                            key=f"modal_select_{i}",
-                            disabled=not can_select,
-                            type="primary" if is_selected else "secondary",
-                            use_container_width=True,
-                        ):
-                            if is_selected:
-                                st.session_state.selected_jobs.remove(job_title)
-                            else:
-                                st.session_state.selected_jobs.append(job_title)
-                            st.rerun()
-
-                    st.divider()
+                with col2:
+                    # Profile match
+                    if record.get("profile_match"):
+                        st.markdown("### Why This Matches You")
+                        st.info(record["profile_match"])
+
+                    # Quick select button
+                    job_id = record["id"]
+                    is_selected = job_id in st.session_state.selected_jobs
+                    can_select = len(st.session_state.selected_jobs) < 3 or is_selected
+
+                    if st.button(
+                        f"{'✓ Selected' if is_selected else 'Select Job'}",
+                        key=f"modal_select_{job_id}",
+                        disabled=not can_select,
+                        type="primary" if is_selected else "secondary",
+                        use_container_width=True,
+                    ):
+                        toggle_job_selection(job_id)
+                        st.rerun()
+
+                st.divider()
@@ -1,11 +1,23 @@
 """Helper functions for the Streamlit app."""
 
 import streamlit as st
-from langchain_core.messages import HumanMessage, AIMessage
-from agent.graph import graph
+from agent.graph import (
+    more_job_recommendations,
+    recommendation_graph,
+    end_profiling_thread,
+    get_profiling_thread_bytes,
+    has_profiling_thread,
+    resume_profiling_thread,
+    start_profiling_thread,
+    update_profiling_thread,
+)
 import os
 from dotenv import load_dotenv
 from stages import Stage
+import httpx
+import uuid
+from agent.transcript import MESSAGE_STORE, get_deep_size
+from agent.event_log import TurnLogger
 
 
 def load_environment():
@@ -15,11 +27,11 @@ def load_environment():
 
 def init_state():
     """Initialize session state variables."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     if "graph_state" not in st.session_state:
-        # Minimal overall state
-        st.session_state.graph_state = {"messages": [], "do_profiling": True}
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+        # Minimal overall state, messages live in the shared message store
+        st.session_state.graph_state = {"do_profiling": True}
     if "stage" not in st.session_state:
         st.session_state.stage = Stage.PROFILING
     if "pending_questions" not in st.session_state:
@@ -31,17 +43,13 @@ def init_state():
     if "intro_shown" not in st.session_state:
         st.session_state.intro_shown = False
 
+    # Move conversations of sessions that went idle out of memory, along with
+    # their paused profiling threads
+    for session_id in MESSAGE_STORE.release_idle():
+        end_profiling_thread(session_id)
 
-def add_profiling_intro():
-    """Add intro message for profiling stage if not already shown."""
-    if (
-        not st.session_state.intro_shown
-        and st.session_state.stage == Stage.PROFILING
-        and st.session_state.app_started
-    ):
-        intro_message = {
-            "role": "assistant",
-            "content": """👋 **Welcome to the Profiling Stage!**
+
+PROFILING_INTRO = """👋 **Welcome to the Profiling Stage!**
 
 I'm here to help you discover career opportunities that match your interests, skills, and goals. 
 
@@ -58,9 +66,16 @@ I'm here to help you discover career opportunities that match your interests, sk
 - **Share your career goals and preferences** (remote work, team size, industry, etc.)
 - **Don't worry about being perfect** - we can refine details as we go
 
-**Ready to start?** Just tell me about yourself, your interests, or ask me any questions about career planning!""",
-        }
-        st.session_state.chat_history.append(intro_message)
+**Ready to start?** Just tell me about yourself, your interests, or ask me any questions about career planning!"""
+
+
+def add_profiling_intro():
+    """Show the intro message for profiling stage if not already shown."""
+    if (
+        not st.session_state.intro_shown
+        and st.session_state.stage == Stage.PROFILING
+        and st.session_state.app_started
+    ):
         st.session_state.intro_shown = True
 
 
@@ -83,58 +98,191 @@ def check_api_key():
         st.stop()  # Stop execution completely
 
 
+def add_user_message(content: str):
+    """Add a user message to the conversation of the current session."""
+    MESSAGE_STORE.append(st.session_state.session_id, "user", content)
+
+
+def get_session_memory_bytes() -> int:
+    """
+    Approximate resident bytes of the current session.
+
+    Counts the message window, the graph state with its recommendation records
+    and question queue, and the checkpointed profiling thread.
+    """
+    session_id = st.session_state.session_id
+    return (
+        MESSAGE_STORE.memory_report().get(session_id, 0)
+        + get_deep_size(st.session_state.graph_state)
+        + get_profiling_thread_bytes(session_id)
+    )
+
+
+def apply_api_state(state: dict):
+    """Merge session state returned by the counselor API into the app."""
+    # Keep only the assistant messages that are new since the last response,
+    # the server holds the rest
+    messages = state.pop("messages", [])
+    for message in messages[st.session_state.get("api_message_count", 0) :]:
+        if message["role"] == "assistant":
+            MESSAGE_STORE.append(
+                st.session_state.session_id, "assistant", message["content"]
+            )
+    st.session_state.api_message_count = len(messages)
+
+    st.session_state.graph_state.update(state)
+    if state.get("profile_questions"):
+        st.session_state.pending_questions = state["profile_questions"]
+
+
+def run_turn_via_api(user_input: str):
+    """Send user input to the counselor API and merge the returned session state."""
+    api_url = os.getenv("COUNSELOR_API_URL").rstrip("/")
+
+    if "thread_id" not in st.session_state:
+        response = httpx.post(f"{api_url}/sessions")
+        response.raise_for_status()
+        st.session_state.thread_id = response.json()["thread_id"]
+
+    response = httpx.post(
+        f"{api_url}/sessions/{st.session_state.thread_id}/messages",
+        json={
+            "content": user_input,
+            "do_profiling": st.session_state.graph_state.get("do_profiling", True),
+        },
+        timeout=120,
+    )
+    response.raise_for_status()
+    apply_api_state(response.json()["state"])
+
+
+def run_turn_locally(user_input: str):
+    """Resume the session's paused profiling thread with the user input."""
+    session_id = st.session_state.session_id
+    graph_state = st.session_state.graph_state
+    turn_log = TurnLogger(session_id, graph_state, user_input)
+
+    error = None
+    try:
+        if not has_profiling_thread(session_id):
+            # New or released session, the thread starts from the conversation
+            # so far without the message it is about to be resumed with
+            start_profiling_thread(
+                session_id,
+                {
+                    **graph_state,
+                    "messages": MESSAGE_STORE.to_messages(session_id)[:-1],
+                },
+            )
+
+        for event in resume_profiling_thread(
+            session_id, user_input, graph_state.get("do_profiling", True)
+        ):
+            for node_name, value in event.items():
+                turn_log.node(node_name, value)
+
+                # Merge new values into state
+                for k, v in value.items():
+                    if k == "messages":
+                        # New messages go to the message store only
+                        for message in v or []:
+                            MESSAGE_STORE.append(
+                                session_id, "assistant", message.content
+                            )
+                    else:
+                        graph_state[k] = v
+
+                # Track profile questions if produced
+                if value.get("profile_questions"):
+                    st.session_state.pending_questions = value["profile_questions"]
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        turn_log.end(error)
+
+
 def stream_user_input(user_input: str):
-    """Send user input through the langgraph and update session state."""
-    state = st.session_state.graph_state
-
-    # Convert existing dict messages to LangChain message objects for compatibility
-    normalized_messages = []
-    for m in state.get("messages", []):
-        if isinstance(m, (HumanMessage, AIMessage)):
-            normalized_messages.append(m)
-        else:
-            role = m.get("role") if isinstance(m, dict) else None
-            content = m.get("content") if isinstance(m, dict) else str(m)
-            if role == "user":
-                normalized_messages.append(HumanMessage(content=content))
-            else:
-                normalized_messages.append(AIMessage(content=content))
-    state["messages"] = normalized_messages + [HumanMessage(content=user_input)]
-
-    for event in graph.stream(state):
-        for node_name, value in event.items():
-            # Merge new values into state
-            for k, v in value.items():
-                if k == "messages" and v:
-                    # Append only new messages
-                    state.setdefault("messages", []).extend(v)
+    """
+    Send user input through the langgraph and update session state.
+
+    The user message must already be in the message store, see add_user_message.
+    """
+    # With COUNSELOR_API_URL set the app is a thin client of the HTTP API
+    if os.getenv("COUNSELOR_API_URL"):
+        run_turn_via_api(user_input)
+    else:
+        run_turn_locally(user_input)
+
+
+def enter_recommendation_stage():
+    """
+    Generate job recommendations for the current profile.
+
+    The profile is only extracted again if the user said something new since
+    the last extraction, and unchanged recommendations are kept.
+    """
+    st.session_state.graph_state["do_profiling"] = False
+
+    if os.getenv("COUNSELOR_API_URL"):
+        if "thread_id" not in st.session_state:
+            # Nothing was said yet, so there is no profile to recommend for
+            return
+        api_url = os.getenv("COUNSELOR_API_URL").rstrip("/")
+        response = httpx.post(
+            f"{api_url}/sessions/{st.session_state.thread_id}/recommendations",
+            timeout=120,
+        )
+        response.raise_for_status()
+        apply_api_state(response.json()["state"])
+        return
+
+    session_id = st.session_state.session_id
+    graph_state = st.session_state.graph_state
+    state = {**graph_state, "messages": MESSAGE_STORE.to_messages(session_id)}
+    update = {}
+    for event in recommendation_graph.stream(state):
+        for value in event.values():
+            for key, item in value.items():
+                if key == "messages":
+                    for message in item or []:
+                        MESSAGE_STORE.append(session_id, "assistant", message.content)
                 else:
-                    state[k] = v
-
-            # Track profile questions if produced
-            if value.get("profile_questions"):
-                st.session_state.pending_questions = value["profile_questions"]
-
-    # Update chat history for display (convert to simple role/content)
-    # Preserve any intro messages that aren't in the graph state
-    intro_messages = []
-    for msg in st.session_state.chat_history:
-        if msg.get(
-            "role"
-        ) == "assistant" and "Welcome to the Profiling Stage" in msg.get("content", ""):
-            intro_messages.append(msg)
-
-    # Rebuild chat history from graph state
-    new_chat_history = intro_messages.copy()  # Start with preserved intro messages
-    for msg in state.get("messages", []):
-        if isinstance(msg, HumanMessage):
-            new_chat_history.append({"role": "user", "content": msg.content})
-        elif isinstance(msg, AIMessage):
-            new_chat_history.append({"role": "assistant", "content": msg.content})
-
-    # Update session state chat history
-    st.session_state.chat_history = new_chat_history
-    st.session_state.graph_state = state
+                    graph_state[key] = update[key] = item
+
+    update_profiling_thread(session_id, {**update, "do_profiling": False})
+
+
+def show_more_recommendations():
+    """Generate the next page of job recommendations, excluding shown roles."""
+    if os.getenv("COUNSELOR_API_URL"):
+        api_url = os.getenv("COUNSELOR_API_URL").rstrip("/")
+        response = httpx.post(
+            f"{api_url}/sessions/{st.session_state.thread_id}/recommendations/more",
+            timeout=120,
+        )
+        response.raise_for_status()
+        records = response.json()["recommendations"]
+        st.session_state.graph_state["job_recommendations"] = {
+            record["id"]: record for record in records
+        }
+        return
+
+    update = more_job_recommendations(st.session_state.graph_state)
+    for key, value in update.items():
+        if key == "messages":
+            for message in value:
+                MESSAGE_STORE.append(
+                    st.session_state.session_id, "assistant", message.content
+                )
+        else:
+            st.session_state.graph_state[key] = value
+
+    # The paused thread needs the new page, so later turns build on it
+    update_profiling_thread(
+        st.session_state.session_id,
+        {key: value for key, value in update.items() if key != "messages"},
+    )
 
 
 def stage_header():
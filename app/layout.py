@@ -8,7 +8,10 @@ from helpers import (
     check_api_key,
     stream_user_input,
     stage_header,
+    add_user_message,
 )
+from agent.transcript import MESSAGE_STORE
+from profiling import profile_turn
 from controls import (
     left_sidebar_controls,
     right_sidebar_controls,
@@ -79,18 +82,17 @@ def render_layout():
             # Chat input
             if user_input := st.chat_input("Your message"):
                 # Immediately show user message and set processing state
-                st.session_state.chat_history.append(
-                    {"role": "user", "content": user_input}
-                )
+                add_user_message(user_input)
                 st.session_state.processing = True
                 st.rerun()
 
             # Process any pending input
-            if st.session_state.processing and st.session_state.chat_history:
-                last_message = st.session_state.chat_history[-1]
-                if last_message["role"] == "user":
+            last_message = MESSAGE_STORE.last(st.session_state.session_id)
+            if st.session_state.processing and last_message:
+                if last_message.role == "user":
                     # Process the most recent user message
-                    stream_user_input(last_message["content"])
+                    with profile_turn("streamlit_turn"):
+                        stream_user_input(last_message.content)
                     st.session_state.processing = False
                     st.rerun()
 
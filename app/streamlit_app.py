@@ -1,6 +1,15 @@
 """Main Streamlit app - Study & Work Counselor."""
 
+import argparse
+
 from layout import main
+from profiling import enable_profiling
 
 if __name__ == "__main__":
+    # Script arguments go after "--", e.g. streamlit run app/streamlit_app.py -- --profile-dir profiles
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile-dir")
+    args, _ = parser.parse_known_args()
+    enable_profiling(args.profile_dir)
+
     main()
@@ -0,0 +1,195 @@
+"""Per-session and per-day token budgets with step-by-step degradation."""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+
+from config import (
+    DAILY_INPUT_TOKEN_BUDGET,
+    DAILY_OUTPUT_TOKEN_BUDGET,
+    SESSION_INPUT_TOKEN_BUDGET,
+    SESSION_OUTPUT_TOKEN_BUDGET,
+    TOKEN_USAGE_PATH,
+)
+
+# Share of a budget used from which each degradation step applies, mildest first
+DEGRADATION_STEPS = [
+    (0.5, "cheaper_model"),
+    (0.75, "short_history"),
+    (0.9, "no_new_questions"),
+]
+
+# Steps that apply to the node that is currently running
+active_steps: ContextVar[tuple[str, ...]] = ContextVar("active_steps", default=())
+# Tokens used by the LLM calls of the node that is currently running
+node_usage: ContextVar[dict | None] = ContextVar("node_usage", default=None)
+# Session usage after the calls of a node that failed, for its fallback to keep
+failed_node_usage: ContextVar[dict | None] = ContextVar(
+    "failed_node_usage", default=None
+)
+
+
+class BudgetExceeded(RuntimeError):
+    """The session or the day has used up its token budget."""
+
+
+class DailyTokenUsage:
+    """Tokens used per day by all sessions, shared between processes."""
+
+    def __init__(self, path: str = TOKEN_USAGE_PATH):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS token_usage (
+                    day TEXT PRIMARY KEY,
+                    input_tokens INTEGER NOT NULL,
+                    output_tokens INTEGER NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, day: str | None = None) -> dict:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT input_tokens, output_tokens FROM token_usage WHERE day = ?",
+                (day or time.strftime("%Y-%m-%d"),),
+            ).fetchone()
+        input_tokens, output_tokens = row or (0, 0)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens}
+
+    def add(self, usage: dict):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO token_usage VALUES (?, ?, ?)
+                ON CONFLICT (day) DO UPDATE SET
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens
+                """,
+                (
+                    time.strftime("%Y-%m-%d"),
+                    usage["input_tokens"],
+                    usage["output_tokens"],
+                ),
+            )
+
+
+daily_usage = None
+
+
+def get_daily_usage() -> DailyTokenUsage:
+    # Created lazily so importing the module does not touch the file system
+    global daily_usage
+    if daily_usage is None:
+        daily_usage = DailyTokenUsage()
+    return daily_usage
+
+
+def get_budget_status(state) -> dict:
+    """
+    Compare the session's and today's token usage with their budgets.
+
+    Returns:
+        dict: Session and daily usage, the largest share of any budget used and
+        the degradation steps that apply at that share
+    """
+    session = state.get("token_usage") or {"input_tokens": 0, "output_tokens": 0}
+    daily = get_daily_usage().get()
+    shares = [
+        used / budget
+        for used, budget in (
+            (session["input_tokens"], SESSION_INPUT_TOKEN_BUDGET),
+            (session["output_tokens"], SESSION_OUTPUT_TOKEN_BUDGET),
+            (daily["input_tokens"], DAILY_INPUT_TOKEN_BUDGET),
+            (daily["output_tokens"], DAILY_OUTPUT_TOKEN_BUDGET),
+        )
+        # A budget of 0 is no budget
+        if budget
+    ]
+    used = max(shares, default=0.0)
+    return {
+        "session": session,
+        "daily": daily,
+        "used": used,
+        "steps": [step for threshold, step in DEGRADATION_STEPS if used >= threshold],
+    }
+
+
+def is_budget_step_active(step: str) -> bool:
+    return step in active_steps.get()
+
+
+def record_usage(raw_message):
+    # Every call is billed, so today's usage counts it right away, also when
+    # its node fails later. The session's share is only counted while a node
+    # runs under with_token_budget
+    metadata = getattr(raw_message, "usage_metadata", None)
+    if not metadata:
+        return
+    call_usage = {
+        "input_tokens": metadata.get("input_tokens", 0),
+        "output_tokens": metadata.get("output_tokens", 0),
+    }
+    get_daily_usage().add(call_usage)
+    usage = node_usage.get()
+    if usage is not None:
+        usage["input_tokens"] += call_usage["input_tokens"]
+        usage["output_tokens"] += call_usage["output_tokens"]
+
+
+def with_token_budget(node):
+    """
+    Check the token budgets before running a node, and count what it used.
+
+    The node runs with the degradation steps of the current usage. Its update
+    carries the session's new token usage. When the node fails after calls that
+    used tokens, the new usage is left in failed_node_usage instead.
+    """
+
+    @wraps(node)
+    def run(state):
+        status = get_budget_status(state)
+        if status["used"] >= 1.0:
+            raise BudgetExceeded(f"{status['used']:.0%} of the token budget used")
+
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        session = status["session"]
+        steps_token = active_steps.set(tuple(status["steps"]))
+        usage_token = node_usage.set(usage)
+        try:
+            update = node(state)
+        except Exception:
+            # Not set on the error, coalesced calls share theirs between sessions
+            if any(usage.values()):
+                failed_node_usage.set(get_session_usage(session, usage))
+            raise
+        finally:
+            active_steps.reset(steps_token)
+            node_usage.reset(usage_token)
+
+        if not any(usage.values()):
+            return update
+        return {**update, "token_usage": get_session_usage(session, usage)}
+
+    return run
+
+
+def get_session_usage(session: dict, usage: dict) -> dict:
+    return {
+        "input_tokens": session["input_tokens"] + usage["input_tokens"],
+        "output_tokens": session["output_tokens"] + usage["output_tokens"],
+    }
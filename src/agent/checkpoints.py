@@ -0,0 +1,65 @@
+"""In-memory checkpoints that keep only the latest state of each thread."""
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class LatestCheckpointSaver(InMemorySaver):
+    """
+    Checkpointer for long-lived threads that do not need their history.
+
+    InMemorySaver keeps a checkpoint for every step of every turn. Pruning a
+    thread drops all but its latest checkpoint, with the pending writes and
+    channel values only the dropped ones used, so a thread's memory stays
+    bounded by its state rather than growing with each turn.
+    """
+
+    def prune(self, thread_id: str):
+        for checkpoint_ns, checkpoints in self.storage.get(thread_id, {}).items():
+            if not checkpoints:
+                continue
+            latest_id = max(checkpoints)
+            latest = self.serde.loads_typed(checkpoints[latest_id][0])
+            for checkpoint_id in [id_ for id_ in checkpoints if id_ != latest_id]:
+                del checkpoints[checkpoint_id]
+            for key in list(self.writes):
+                if key[:2] == (thread_id, checkpoint_ns) and key[2] != latest_id:
+                    del self.writes[key]
+
+            # Channel values are stored per version, keep the latest versions
+            versions = latest["channel_versions"]
+            for key in list(self.blobs):
+                blob_thread_id, blob_ns, channel, version = key
+                if (
+                    blob_thread_id == thread_id
+                    and blob_ns == checkpoint_ns
+                    and versions.get(channel) != version
+                ):
+                    del self.blobs[key]
+
+    def count_checkpoints(self, thread_id: str) -> int:
+        return sum(
+            len(checkpoints) for checkpoints in self.storage.get(thread_id, {}).values()
+        )
+
+    def get_thread_bytes(self, thread_id: str) -> int:
+        """
+        Sum the serialized checkpoints, writes and channel values of a thread.
+
+        Returns:
+            int: Bytes held for the thread
+        """
+        size = sum(
+            len(checkpoint) + len(metadata)
+            for checkpoints in self.storage.get(thread_id, {}).values()
+            for (_, checkpoint), (_, metadata), _ in checkpoints.values()
+        )
+        size += sum(
+            len(value)
+            for key, writes in self.writes.items()
+            if key[0] == thread_id
+            for _, _, (_, value), _ in writes.values()
+        )
+        size += sum(
+            len(value) for key, (_, value) in self.blobs.items() if key[0] == thread_id
+        )
+        return size
@@ -0,0 +1,121 @@
+"""
+Single-flight coalescing of identical concurrent LLM requests.
+
+Callers with the same request key share one in-flight call, and all of them get
+its result or its error. Sync and async callers share the same flights, so a
+request started in a worker thread is also joined from an event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+
+from config import COALESCE_LLM_CALLS
+
+
+def get_request_key(*parts) -> str:
+    """
+    Fingerprint the parts that make two requests identical.
+
+    Returns:
+        str: Hex digest of the JSON encoded parts
+    """
+    encoded = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, concurrent callers wait for it."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.flights: dict[str, Future] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str) -> tuple[Future, bool]:
+        # The first caller of a key leads the flight, later ones follow it
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self.flights.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = self.flights[key] = Future()
+            return future, True
+
+    def _land(self, key: str, future: Future, result=None, error=None):
+        with self._lock:
+            del self.flights[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def call(self, key: str, call: Callable, timeout: float | None = None):
+        """
+        Run a call, or wait for the identical one that is already running.
+
+        Followers wait at most timeout seconds and raise TimeoutError after.
+
+        Returns:
+            The result of the call that ran for the key
+        """
+        if not self.enabled:
+            return call()
+
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(timeout)
+
+        try:
+            result = call()
+        except BaseException as error:
+            self._land(key, future, error=error)
+            raise
+        self._land(key, future, result)
+        return result
+
+    async def acall(
+        self, key: str, call: Callable[[], Awaitable], timeout: float | None = None
+    ):
+        """
+        Await a call, or the identical one that is already running.
+
+        Returns:
+            The result of the call that ran for the key
+        """
+        if not self.enabled:
+            return await call()
+
+        future, leader = self._join(key)
+        if not leader:
+            # Shielded, so a follower that gives up does not cancel the flight
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout
+            )
+
+        try:
+            result = await call()
+        except BaseException as error:
+            # A cancelled leader must not leave its followers waiting
+            self._land(key, future, error=error)
+            raise
+        self._land(key, future, result)
+        return result
+
+    def report(self) -> dict:
+        """
+        Summarize coalescing.
+
+        Returns:
+            dict: Calls, calls that joined another one and calls in flight
+        """
+        with self._lock:
+            return {**self.stats, "in_flight": len(self.flights)}
+
+
+COALESCER = SingleFlight(COALESCE_LLM_CALLS)
@@ -0,0 +1,87 @@
+"""Per-turn latency budget shared by the nodes of the graph."""
+
+import time
+from functools import wraps
+
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from agent.budget import BudgetExceeded, failed_node_usage
+from config import TURN_DEADLINE_SECONDS
+
+
+class DeadlineExceeded(TimeoutError):
+    """The turn has no time left for another LLM call."""
+
+
+# Provider errors that usually pass, timeouts are connection errors too
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+# Errors that mean the node ran out of time or tokens, or the provider is
+# unavailable, rather than that the node failed
+DEGRADING_ERRORS = (
+    DeadlineExceeded,
+    APITimeoutError,
+    BudgetExceeded,
+    *TRANSIENT_ERRORS,
+)
+
+
+def start_turn(state) -> dict:
+    """
+    Graph entry node that gives the turn a fresh latency budget.
+
+    Returns:
+        dict: The absolute deadline of the turn, None without a budget, and a
+        reset degraded flag
+    """
+    deadline = time.time() + TURN_DEADLINE_SECONDS if TURN_DEADLINE_SECONDS else None
+    return {"deadline": deadline, "degraded": False}
+
+
+def get_remaining_seconds(state) -> float | None:
+    """
+    Time left for the turn, used as the timeout of a node's LLM calls.
+
+    Returns:
+        float | None: Seconds left, or None if the turn has no deadline
+    """
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"Turn deadline passed {-remaining:.1f}s ago")
+    return remaining
+
+
+def with_deadline(node, fallback):
+    """
+    Run a node within the turn budget and fall back to a degraded response.
+
+    The fallback is used when the turn runs out of time or the token budget
+    refuses the node. It gets the same state and returns the update to use
+    instead of the node's own. The update is marked as degraded, so clients can
+    tell, and keeps the tokens the node used before it failed.
+    """
+
+    @wraps(node)
+    def run(state):
+        usage_token = failed_node_usage.set(None)
+        try:
+            get_remaining_seconds(state)
+            return node(state)
+        except DEGRADING_ERRORS:
+            update = {**fallback(state), "degraded": True}
+            if failed_node_usage.get() is not None:
+                update["token_usage"] = failed_node_usage.get()
+            return update
+        finally:
+            failed_node_usage.reset(usage_token)
+
+    return run
@@ -0,0 +1,199 @@
+"""Full-text index of the bundled education programmes, used for education paths."""
+
+import csv
+import json
+import re
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+from agent.models import JobRecommendations
+
+PROGRAMMES_PATH = Path(__file__).parent / "data" / "education_programmes.csv"
+
+# Number of programmes listed as education for one job role
+EDUCATION_MATCH_LIMIT = 3
+
+# bm25 weights per column: name, level, duration, related_roles, description.
+# A job role listed as a related role counts far more than a mention in the
+# description
+BM25_WEIGHTS = (2.0, 0.0, 0.0, 10.0, 1.0)
+
+QUERY_STOPWORDS = {"a", "an", "and", "for", "in", "of", "or", "the", "to", "with"}
+
+# Ranked programmes checked for a related role that fits the job role
+CANDIDATE_LIMIT = 20
+
+
+def get_words(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def get_role_match(job_role: str, related_roles: list[str]) -> int:
+    """
+    Measure how well a programme's related roles fit a job role.
+
+    A related role fits when the job role contains all of its words in order,
+    so "senior data analyst" fits "data analyst", but "architect" does not fit
+    "software architect".
+
+    Returns:
+        int: Words in the longest related role that fits, 0 if none does
+    """
+    words = get_words(job_role)
+    best = 0
+    for related_role in related_roles:
+        related_words = get_words(related_role)
+        size = len(related_words)
+        if any(
+            words[start : start + size] == related_words
+            for start in range(len(words) - size + 1)
+        ):
+            best = max(best, size)
+    return best
+
+
+def build_match_query(job_role: str) -> str | None:
+    """
+    Turn a free text job role into an FTS5 query.
+
+    The full phrase is matched next to each of its words, so "data analyst"
+    ranks programmes listing that exact role above ones matching only "data".
+
+    Returns:
+        str | None: The MATCH expression, or None if the role has no usable words
+    """
+    words = [word for word in get_words(job_role) if word not in QUERY_STOPWORDS]
+    if not words:
+        return None
+
+    # Quoting keeps words like "and" or "near" from being read as operators
+    terms = [f'"{word}"' for word in words]
+    if len(words) > 1:
+        terms.insert(0, f'"{" ".join(words)}"')
+    return " OR ".join(terms)
+
+
+class EducationIndex:
+    """In-memory SQLite FTS5 index over the education programme dataset."""
+
+    def __init__(self, path: Path = PROGRAMMES_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE VIRTUAL TABLE programmes USING fts5(
+                name, level UNINDEXED, duration UNINDEXED, related_roles,
+                description, tokenize = 'porter unicode61'
+            )
+            """
+        )
+        with open(path, newline="", encoding="utf-8") as f:
+            self._conn.executemany(
+                """
+                INSERT INTO programmes
+                VALUES (:name, :level, :duration, :related_roles, :description)
+                """,
+                csv.DictReader(f),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM programmes").fetchone()[0]
+
+    def search(self, job_role: str, limit: int = EDUCATION_MATCH_LIMIT) -> list[dict]:
+        """
+        Find the programmes that lead to a job role.
+
+        Words of the role only rank the candidates. A programme is only
+        returned if one of its related roles fits the job role, and only the
+        programmes with the most specific fitting role are kept, so "software
+        engineer" is not served a programme listed for any "engineer".
+
+        Returns:
+            list[dict]: Matching programmes, best match first, empty if no
+            programme lists the role
+        """
+        query = build_match_query(job_role)
+        if query is None:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT name, level, duration, related_roles, description
+                FROM programmes WHERE programmes MATCH ?
+                ORDER BY bm25(programmes, {", ".join(map(str, BM25_WEIGHTS))})
+                LIMIT ?
+                """,
+                (query, CANDIDATE_LIMIT),
+            ).fetchall()
+
+        programmes = [
+            {
+                "name": name,
+                "level": level,
+                "duration": duration,
+                "related_roles": related_roles.split("; "),
+                "description": description,
+            }
+            for name, level, duration, related_roles, description in rows
+        ]
+        matches = [
+            get_role_match(job_role, programme["related_roles"])
+            for programme in programmes
+        ]
+        best = max(matches, default=0)
+        if not best:
+            return []
+        return [
+            programme for programme, match in zip(programmes, matches) if match == best
+        ][:limit]
+
+
+education_index = None
+
+
+def get_education_index() -> EducationIndex:
+    # Built on first use, which takes a few milliseconds
+    global education_index
+    if education_index is None:
+        education_index = EducationIndex()
+    return education_index
+
+
+def find_programmes(job_role: str, limit: int = EDUCATION_MATCH_LIMIT) -> list[dict]:
+    return get_education_index().search(job_role, limit)
+
+
+def format_programmes(programmes: list[dict]) -> str | None:
+    if not programmes:
+        return None
+    return "; ".join(
+        f"{programme['name']} ({programme['level']}, {programme['duration']})"
+        for programme in programmes
+    )
+
+
+def fill_education(response: JobRecommendations) -> JobRecommendations:
+    """
+    Set the education of each recommendation from the programme index.
+
+    A role that no programme lists keeps the education it came with, the index
+    has nothing better to offer for it.
+
+    Returns:
+        JobRecommendations: The same response with education filled in
+    """
+    for recommendation in response.recommendations:
+        recommendation.education = (
+            format_programmes(find_programmes(recommendation.job_role))
+            or recommendation.education
+        )
+    return response
+
+
+if __name__ == "__main__":
+    for programme in find_programmes(" ".join(sys.argv[1:]) or "software developer"):
+        print(json.dumps(programme))
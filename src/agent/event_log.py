@@ -0,0 +1,294 @@
+"""
+Append-only log of graph events, written as rotating gzip JSON-lines files.
+
+Every turn is logged as a "turn" event with the user input, one "node" event per
+graph update holding only the state keys that changed, and an "end" event with
+the total duration. Events are queued and written by a background thread, so
+callers never wait on disk.
+
+Summarize a log directory, or replay the state of one session, with:
+    python -m agent.event_log [--session SESSION_ID] [--dir DIRECTORY]
+"""
+
+import argparse
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterator
+from pathlib import Path
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from config import EVENT_LOG_DIR, EVENT_LOG_MAX_BYTES, EVENT_LOG_MAX_FILES
+
+# Buffered events are flushed to disk at least this often
+FLUSH_INTERVAL_SECONDS = 1.0
+
+
+def serialize_message(message) -> dict:
+    if isinstance(message, dict):
+        return {"role": message.get("role"), "content": message.get("content")}
+    if isinstance(message, BaseMessage):
+        role = "user" if isinstance(message, HumanMessage) else "assistant"
+        return {"role": role, "content": message.content}
+    return {"role": "user", "content": str(message)}
+
+
+def get_state_delta(state: dict, update: dict) -> dict:
+    """
+    Keep only the parts of a node update that change the state.
+
+    Returns:
+        dict: New messages and the keys whose value differs from the state
+    """
+    delta = {}
+    for key, value in (update or {}).items():
+        if key == "messages":
+            if value:
+                delta[key] = [serialize_message(m) for m in value]
+        elif state.get(key) != value:
+            delta[key] = value
+    return delta
+
+
+class EventLog:
+    """
+    Background writer of rotating, compressed JSON-lines event files.
+
+    A file is rotated once it holds max_bytes of uncompressed events, and only
+    the newest max_files files are kept.
+    """
+
+    def __init__(
+        self,
+        directory: str = EVENT_LOG_DIR,
+        max_bytes: int = EVENT_LOG_MAX_BYTES,
+        max_files: int = EVENT_LOG_MAX_FILES,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._lock = threading.Lock()
+        self._file_count = 0
+
+    def emit(self, event: dict):
+        """Queue an event for writing, without blocking on disk."""
+        if self._writer is None:
+            self._start_writer()
+        self._queue.put({"ts": time.time(), **event})
+
+    def close(self):
+        """Write all queued events and stop the writer."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(
+                target=self._run, name="counselor-event-log", daemon=True
+            )
+            self._writer.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        event = self._queue.get()
+        while event is not None:
+            event = self._write_file(event)
+
+    def _write_file(self, event: dict) -> dict | None:
+        """
+        Write events to a new file, starting with the given one, until it is full.
+
+        Returns:
+            dict | None: The first event of the next file, or None once the log
+            is closed
+        """
+        self._file_count += 1
+        name = (
+            f"events-{time.strftime('%Y%m%d-%H%M%S')}"
+            f"-{os.getpid()}-{self._file_count:04d}.jsonl.gz"
+        )
+        with gzip.open(self.directory / name, "at", encoding="utf-8") as file:
+            for path in list_event_files(self.directory)[: -self.max_files]:
+                path.unlink(missing_ok=True)
+
+            file_bytes = 0
+            last_flush = time.monotonic()
+            while event is not None and file_bytes < self.max_bytes:
+                line = json.dumps(event, default=str) + "\n"
+                file.write(line)
+                file_bytes += len(line)
+                if time.monotonic() - last_flush >= FLUSH_INTERVAL_SECONDS:
+                    file.flush()
+                    last_flush = time.monotonic()
+                event = self._get_event(file)
+        return event
+
+    def _get_event(self, file) -> dict | None:
+        # Events written so far are flushed while waiting for the next one
+        while True:
+            try:
+                return self._queue.get(timeout=FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                file.flush()
+
+
+class TurnLogger:
+    """Log the events of one turn, with timings and state deltas."""
+
+    def __init__(
+        self,
+        session_id: str,
+        state: dict,
+        user_input: str,
+        event_log: EventLog | None = None,
+    ):
+        self.event_log = event_log or get_event_log()
+        self.session_id = session_id
+        self.turn_id = uuid.uuid4().hex[:12]
+        # Shallow copy, only used to tell which keys an update changes
+        self.state = dict(state)
+        self.start = self.last = time.perf_counter()
+        self._emit("turn", user_input=user_input)
+
+    def _emit(self, event_type: str, **fields):
+        if self.event_log is not None:
+            self.event_log.emit(
+                {
+                    "type": event_type,
+                    "session_id": self.session_id,
+                    "turn_id": self.turn_id,
+                    **fields,
+                }
+            )
+
+    def node(self, node_name: str, update: dict):
+        now = time.perf_counter()
+        delta = get_state_delta(self.state, update)
+        self.state.update({k: v for k, v in delta.items() if k != "messages"})
+        self._emit(
+            "node",
+            node=node_name,
+            delta=delta,
+            duration_ms=round((now - self.last) * 1000, 2),
+        )
+        self.last = now
+
+    def end(self, error: str | None = None):
+        duration_ms = round((time.perf_counter() - self.start) * 1000, 2)
+        self._emit("end", duration_ms=duration_ms, error=error)
+
+
+event_log = None
+
+
+def get_event_log() -> EventLog | None:
+    # Created lazily so importing the module does not start a thread. An empty
+    # COUNSELOR_EVENT_LOG_DIR turns logging off
+    global event_log
+    if event_log is None and EVENT_LOG_DIR:
+        event_log = EventLog()
+    return event_log
+
+
+def list_event_files(directory: str | Path = EVENT_LOG_DIR) -> list[Path]:
+    # File names start with a timestamp, so name order is write order
+    return sorted(Path(directory).glob("events-*.jsonl.gz"))
+
+
+def iter_events(
+    directory: str | Path = EVENT_LOG_DIR, session_id: str | None = None
+) -> Iterator[dict]:
+    """
+    Stream events from the log files, oldest first.
+
+    Yields:
+        dict: One event at a time, optionally only those of one session
+    """
+    for path in list_event_files(directory):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    event = json.loads(line)
+                    if session_id is None or event["session_id"] == session_id:
+                        yield event
+            except EOFError:
+                # The file that is still being written has no gzip trailer yet
+                continue
+
+
+def replay_session(events: Iterator[dict]) -> dict:
+    """
+    Rebuild the final state of a session from its events.
+
+    Returns:
+        dict: The state with messages appended and other keys replaced
+    """
+    state = {"messages": []}
+    for event in events:
+        if event["type"] == "turn":
+            state["messages"].append({"role": "user", "content": event["user_input"]})
+        elif event["type"] == "node":
+            for key, value in event["delta"].items():
+                if key == "messages":
+                    state["messages"].extend(value)
+                else:
+                    state[key] = value
+    return state
+
+
+def summarize_events(events: Iterator[dict]) -> dict:
+    """
+    Aggregate turn and node timings without keeping the events in memory.
+
+    Returns:
+        dict: Session and turn counts, errors and per-node call counts and timings
+    """
+    sessions, turns, errors = set(), 0, 0
+    nodes = defaultdict(lambda: {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+    for event in events:
+        sessions.add(event["session_id"])
+        if event["type"] == "end":
+            turns += 1
+            errors += event.get("error") is not None
+        elif event["type"] == "node":
+            stats = nodes[event["node"]]
+            stats["calls"] += 1
+            stats["total_ms"] += event["duration_ms"]
+            stats["max_ms"] = max(stats["max_ms"], event["duration_ms"])
+
+    for stats in nodes.values():
+        stats["mean_ms"] = round(stats["total_ms"] / stats["calls"], 2)
+    return {
+        "sessions": len(sessions),
+        "turns": turns,
+        "errors": errors,
+        "nodes": dict(nodes),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or replay the event log")
+    parser.add_argument("--dir", default=EVENT_LOG_DIR or ".events")
+    parser.add_argument("--session", help="Replay the state of this session")
+    args = parser.parse_args()
+
+    events = iter_events(args.dir, args.session)
+    if args.session:
+        print(json.dumps(replay_session(events), indent=2, default=str))
+    else:
+        print(json.dumps(summarize_events(events), indent=2))
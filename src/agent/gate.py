@@ -0,0 +1,298 @@
+import re
+from dataclasses import dataclass
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.state import OverallState
+
+# Messages that never carry profile information on their own. Yes/no are left
+# out on purpose since they can answer a question about locality.
+SMALL_TALK = {
+    "ok",
+    "okay",
+    "k",
+    "thanks",
+    "thank",
+    "you",
+    "thx",
+    "ty",
+    "sure",
+    "fine",
+    "cool",
+    "great",
+    "nice",
+    "good",
+    "hi",
+    "hello",
+    "hey",
+    "got",
+    "it",
+    "alright",
+    "right",
+    "perfect",
+    "sounds",
+    "lol",
+}
+
+STOPWORDS = {
+    "a",
+    "about",
+    "also",
+    "am",
+    "an",
+    "and",
+    "are",
+    "as",
+    "at",
+    "be",
+    "but",
+    "by",
+    "do",
+    "for",
+    "from",
+    "have",
+    "i",
+    "i'm",
+    "im",
+    "in",
+    "interested",
+    "is",
+    "it",
+    "like",
+    "love",
+    "me",
+    "my",
+    "of",
+    "old",
+    "on",
+    "or",
+    "really",
+    "so",
+    "that",
+    "the",
+    "this",
+    "to",
+    "very",
+    "with",
+    "would",
+    "year",
+    "years",
+}
+
+AGE_PATTERN = re.compile(
+    r"\b(?:i am|i'm|im|age(?: is)?|aged)\s+(\d{1,2})\b|\b(\d{1,2})\s*(?:years?|yrs?)(?: old)?\b",
+    re.IGNORECASE,
+)
+
+LOCAL_PHRASES = (
+    "locally",
+    "stay local",
+    "close to home",
+    "near home",
+    "near my home",
+    "my hometown",
+    "not move",
+    "don't want to move",
+    "do not want to move",
+)
+NOT_LOCAL_PHRASES = (
+    "abroad",
+    "anywhere",
+    "relocate",
+    "move away",
+    "internationally",
+    "other countries",
+    "travel",
+    "not locally",
+    "not local",
+)
+
+PROFILE_LIST_FIELDS = [
+    "interests",
+    "competencies",
+    "personal_characteristics",
+    "job_characteristics",
+]
+
+# Question fields whose state field has another name
+STATE_FIELDS = {"desired_job_characteristics": "job_characteristics"}
+
+# Extracting the profile and asking follow-up questions are both skipped
+LLM_CALLS_PER_SKIPPED_TURN = 2
+
+
+@dataclass
+class GateDecision:
+    skip_extraction: bool
+    reason: str
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"[a-z][a-z'\-]*", text.lower())
+
+
+def parse_age(text: str) -> int | None:
+    match = AGE_PATTERN.search(text)
+    if not match:
+        return None
+    return int(match.group(1) or match.group(2))
+
+
+def parse_locality(text: str) -> bool | None:
+    lowered = text.lower()
+    # Negated phrases are checked first, so "not locally" is not read as "locally"
+    if any(phrase in lowered for phrase in NOT_LOCAL_PHRASES):
+        return False
+    if any(phrase in lowered for phrase in LOCAL_PHRASES):
+        return True
+    return None
+
+
+def get_pending_field(state: OverallState) -> str | None:
+    # The question asked last is the head of the queue
+    queue = state.get("question_queue") or []
+    if not queue:
+        return None
+    field = queue[0]["field"]
+    return STATE_FIELDS.get(field, field)
+
+
+def get_profile_lexicon(state: OverallState, field: str | None) -> set[str]:
+    # Words only count as known for the field the user is answering, "creative"
+    # as a personal characteristic says nothing about the desired job
+    if field not in PROFILE_LIST_FIELDS:
+        return set()
+    lexicon = set()
+    for value in state.get(field) or []:
+        lexicon.update(tokenize(str(value)))
+    return lexicon
+
+
+def get_user_messages(state: OverallState) -> list[str]:
+    user_messages = []
+    for msg in state.get("messages", []):
+        if isinstance(msg, HumanMessage):
+            user_messages.append(msg.content)
+        elif isinstance(msg, dict) and msg.get("role") == "user":
+            user_messages.append(msg.get("content", ""))
+    return user_messages
+
+
+def get_answers(state: OverallState) -> list[tuple[str | None, str]]:
+    """
+    Pair each user message with the assistant message it replied to.
+
+    Returns:
+        list[tuple[str | None, str]]: The preceding assistant message, None if
+        there was none, and the user message
+    """
+    answers = []
+    prompt = None
+    for msg in state.get("messages", []):
+        if isinstance(msg, AIMessage) or (
+            isinstance(msg, dict) and msg.get("role") == "assistant"
+        ):
+            prompt = msg.content if isinstance(msg, AIMessage) else msg.get("content")
+        elif isinstance(msg, HumanMessage) or (
+            isinstance(msg, dict) and msg.get("role") == "user"
+        ):
+            content = (
+                msg.content if isinstance(msg, HumanMessage) else msg.get("content")
+            )
+            answers.append((prompt, content or ""))
+    return answers
+
+
+def has_unprofiled_input(state: OverallState) -> bool:
+    # Counted rather than compared by text, the same short answer can be sent
+    # twice in a row, and the messages in the state are only a window
+    return (state.get("user_message_count") or 0) > (
+        state.get("profiled_message_count") or 0
+    )
+
+
+def has_extracted_profile(state: OverallState) -> bool:
+    return bool(state.get("profile_questions")) and (
+        state.get("age") is not None
+        or state.get("is_locally_focused") is not None
+        or any(state.get(field) for field in PROFILE_LIST_FIELDS)
+    )
+
+
+def screen_user_input(state: OverallState) -> GateDecision:
+    """
+    Decide locally whether the latest user message can change the profile.
+
+    The gate only skips extraction when it is confident: the message is small
+    talk, a repeat of an earlier answer, or every content word is already in
+    the field the pending question targets, and any age or locality it
+    mentions matches the current values.
+
+    Returns:
+        GateDecision: Whether to skip extraction and why
+    """
+    if not state.get("do_profiling", True) or not has_extracted_profile(state):
+        return GateDecision(False, "profiling_not_started")
+
+    user_messages = get_user_messages(state)
+    if not user_messages:
+        return GateDecision(False, "no_user_message")
+
+    latest = user_messages[-1].strip()
+    normalized = " ".join(tokenize(latest))
+    tokens = normalized.split()
+
+    # A repeat only adds nothing when it answers the same question again, a
+    # short answer like "yes" can mean something new for a new question
+    *earlier, (prompt, _) = get_answers(state)
+    if (prompt, normalized) in {
+        (earlier_prompt, " ".join(tokenize(answer)))
+        for earlier_prompt, answer in earlier
+    }:
+        return GateDecision(True, "repeated_message")
+
+    if tokens and all(token in SMALL_TALK for token in tokens):
+        return GateDecision(True, "small_talk")
+
+    age = parse_age(latest)
+    if age is not None and age != state.get("age"):
+        return GateDecision(False, "new_age")
+
+    is_locally_focused = parse_locality(latest)
+    if is_locally_focused is not None and is_locally_focused != state.get(
+        "is_locally_focused"
+    ):
+        return GateDecision(False, "new_locality")
+
+    content_tokens = [
+        token for token in tokens if token not in STOPWORDS and token not in SMALL_TALK
+    ]
+    # Anything left after the age and locality checks must already be known
+    lexicon = get_profile_lexicon(state, get_pending_field(state))
+    if all(token in lexicon for token in content_tokens):
+        return GateDecision(True, "known_information")
+
+    return GateDecision(False, "new_information")
+
+
+def route_user_input(state: OverallState) -> str:
+    if screen_user_input(state).skip_extraction:
+        return "reuse_profile_questions"
+    return "extract_profile_information"
+
+
+def reuse_profile_questions(state: OverallState) -> OverallState:
+    # The gate only skips once questions exist, so there is always one to reuse
+    questions = state["profile_questions"]
+    message = (
+        "I didn't pick up any new profile information. "
+        f"To continue, could you tell me: {questions[0]}"
+    )
+
+    return {
+        "messages": [AIMessage(content=message)],
+        "llm_calls_avoided": (state.get("llm_calls_avoided") or 0)
+        + LLM_CALLS_PER_SKIPPED_TURN,
+        # Screened as having nothing new, which counts as profiled
+        "profiled_message_count": state.get("user_message_count"),
+    }
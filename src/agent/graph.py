@@ -1,25 +1,190 @@
+from collections.abc import Iterator
+
 from langgraph.graph import START, END
+from langgraph.types import Command
 from agent.tasks import (
+    start_user_turn,
+    wait_for_user_input,
     extract_profile_information,
     ask_profile_questions,
     get_job_recommendations,
+    get_more_job_recommendations,
+    refresh_profile_information,
+    keep_profile_information,
+    reuse_queued_questions,
+    keep_job_recommendations,
 )
+from agent.gate import has_unprofiled_input, route_user_input, reuse_profile_questions
+from agent.deadline import start_turn, with_deadline
+from agent.budget import with_token_budget
+from agent.checkpoints import LatestCheckpointSaver
 from langgraph.graph import StateGraph
 from agent.state import OverallState
 
+
+def guard_node(node, fallback):
+    # Token budgets are checked first, a refused node falls back like a slow one
+    return with_deadline(with_token_budget(node), fallback)
+
+
+def add_turn(builder: StateGraph, entry: str, end: str):
+    """Add the nodes of one user turn, running from entry to end."""
+    # Nodes that call the LLM fall back to a degraded answer when the turn runs
+    # out of time or the session out of tokens
+    builder.add_node(
+        "extract_profile_information",
+        guard_node(extract_profile_information, keep_profile_information),
+    )
+    builder.add_node(
+        "ask_profile_questions",
+        guard_node(ask_profile_questions, reuse_queued_questions),
+    )
+    builder.add_node(
+        "get_job_recommendations",
+        guard_node(get_job_recommendations, keep_job_recommendations),
+    )
+    builder.add_node("reuse_profile_questions", reuse_profile_questions)
+
+    # Turns without new profile information skip the LLM calls entirely
+    builder.add_conditional_edges(
+        entry,
+        route_user_input,
+        ["extract_profile_information", "reuse_profile_questions"],
+    )
+    builder.add_conditional_edges(
+        "extract_profile_information",
+        lambda state: state.get("do_profiling", True),
+        {True: "ask_profile_questions", False: "get_job_recommendations"},
+    )
+
+    builder.add_edge("ask_profile_questions", end)
+    builder.add_edge("get_job_recommendations", end)
+    builder.add_edge("reuse_profile_questions", end)
+
+
+# One run per turn, the caller passes in the whole state
 builder = StateGraph(OverallState)
+builder.add_node("start_turn", start_user_turn)
+builder.add_edge(START, "start_turn")
+add_turn(builder, "start_turn", END)
+
+graph = builder.compile()
 
-builder.add_node("extract_profile_information", extract_profile_information)
-builder.add_node("ask_profile_questions", ask_profile_questions)
-builder.add_node("get_job_recommendations", get_job_recommendations)
+# A long-lived thread per session that pauses for user input between turns and
+# resumes where it stopped, with only the new message
+thread_builder = StateGraph(OverallState)
+thread_builder.add_node("wait_for_user_input", wait_for_user_input)
+thread_builder.add_edge(START, "wait_for_user_input")
+add_turn(thread_builder, "wait_for_user_input", "wait_for_user_input")
 
-builder.add_edge(START, "extract_profile_information")
-builder.add_conditional_edges(
-    "extract_profile_information",
-    lambda state: state.get("do_profiling", True),
-    {True: "ask_profile_questions", False: "get_job_recommendations"},
+# Only the latest checkpoint of a thread is kept, see prune_profiling_thread
+profiling_graph = thread_builder.compile(checkpointer=LatestCheckpointSaver())
+
+
+# Entering the recommendation stage directly. The profile is only extracted
+# again when the user said something new since the last extraction
+recommendation_builder = StateGraph(OverallState)
+recommendation_builder.add_node("start_turn", start_turn)
+recommendation_builder.add_node(
+    "refresh_profile_information",
+    guard_node(refresh_profile_information, keep_profile_information),
+)
+recommendation_builder.add_node(
+    "get_job_recommendations",
+    guard_node(get_job_recommendations, keep_job_recommendations),
+)
+recommendation_builder.add_edge(START, "start_turn")
+recommendation_builder.add_conditional_edges(
+    "start_turn",
+    has_unprofiled_input,
+    {True: "refresh_profile_information", False: "get_job_recommendations"},
+)
+recommendation_builder.add_edge(
+    "refresh_profile_information", "get_job_recommendations"
 )
+recommendation_builder.add_edge("get_job_recommendations", END)
 
-builder.add_edge("get_job_recommendations", END)
+recommendation_graph = recommendation_builder.compile()
 
-graph = builder.compile()
+
+def get_thread_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def has_profiling_thread(thread_id: str) -> bool:
+    # Only a thread paused for input can take the next message. A failed turn
+    # leaves the thread at the failed node, and resuming would run that node
+    # again instead of delivering the message
+    snapshot = profiling_graph.get_state(get_thread_config(thread_id))
+    return snapshot.next == ("wait_for_user_input",) and bool(snapshot.interrupts)
+
+
+def start_profiling_thread(thread_id: str, state: dict):
+    """Run a new thread from the given state up to its first wait for input."""
+    # Drop what is left of a thread whose turn failed
+    end_profiling_thread(thread_id)
+    profiling_graph.invoke(state, get_thread_config(thread_id))
+    prune_profiling_thread(thread_id)
+
+
+def resume_profiling_thread(
+    thread_id: str, content: str, do_profiling: bool | None = None
+) -> Iterator[dict]:
+    """
+    Resume a waiting thread with a user message and run the turn.
+
+    Yields:
+        dict: Node updates of the turn, keyed by node name
+    """
+    reply = {"content": content}
+    if do_profiling is not None:
+        reply["do_profiling"] = do_profiling
+
+    try:
+        for event in profiling_graph.stream(
+            Command(resume=reply), get_thread_config(thread_id)
+        ):
+            if "__interrupt__" in event:
+                continue
+            if "wait_for_user_input" in event:
+                # The caller already has the user message
+                update = event["wait_for_user_input"]
+                event = {
+                    "wait_for_user_input": {
+                        key: value for key, value in update.items() if key != "messages"
+                    }
+                }
+            yield event
+    finally:
+        prune_profiling_thread(thread_id)
+
+
+def update_profiling_thread(thread_id: str, update: dict):
+    # For changes made outside of a turn, like a new page of recommendations
+    if has_profiling_thread(thread_id):
+        profiling_graph.update_state(get_thread_config(thread_id), update)
+        prune_profiling_thread(thread_id)
+
+
+def prune_profiling_thread(thread_id: str):
+    # Every step of a turn is checkpointed, between turns only the latest one
+    # is needed to resume
+    profiling_graph.checkpointer.prune(thread_id)
+
+
+def get_profiling_thread_bytes(thread_id: str) -> int:
+    return profiling_graph.checkpointer.get_thread_bytes(thread_id)
+
+
+def end_profiling_thread(thread_id: str):
+    profiling_graph.checkpointer.delete_thread(thread_id)
+
+
+guarded_more_job_recommendations = guard_node(
+    get_more_job_recommendations, keep_job_recommendations
+)
+
+
+def more_job_recommendations(state: OverallState) -> OverallState:
+    # Requested outside of a turn, so it gets a latency budget of its own
+    return guarded_more_job_recommendations({**state, **start_turn(state)})
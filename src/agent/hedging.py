@@ -0,0 +1,182 @@
+"""
+Hedged LLM requests against slow provider responses.
+
+When a hedged call has not finished by the rolling latency percentile of its
+node, a duplicate request is sent. Whichever finishes first is used, and the
+other one is cancelled. Hedges are capped by a budget, a fraction of all
+hedged calls.
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from config import HEDGE_BUDGET, HEDGED_NODES
+
+# Latencies kept per node, and how many are needed before hedging starts
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 20
+
+
+def parse_hedged_nodes(value: str) -> dict[str, float]:
+    """
+    Parse the hedging policy, e.g. "get_job_recommendations:0.9,ask_profile_questions".
+
+    Returns:
+        dict[str, float]: Latency percentile after which to hedge, by node name
+    """
+    policies = {}
+    for item in value.split(","):
+        name, _, percentile = item.strip().partition(":")
+        if name:
+            policies[name] = float(percentile or 0.9)
+    return policies
+
+
+class RequestHedger:
+    """
+    Race a duplicate request against calls slower than their node usually is.
+
+    Policies map node names to a latency percentile. A call is hedged if its
+    name is a node name, or starts with one followed by an underscore, so
+    variants of a node's prompt share its policy.
+    """
+
+    def __init__(
+        self,
+        policies: dict[str, float],
+        budget: float = HEDGE_BUDGET,
+        min_samples: int = MIN_LATENCY_SAMPLES,
+    ):
+        self.policies = policies
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.stats = defaultdict(lambda: {"calls": 0, "fired": 0, "won": 0})
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def get_policy(self, name: str) -> str | None:
+        for node in self.policies:
+            if name == node or name.startswith(f"{node}_"):
+                return node
+        return None
+
+    def get_threshold(self, node: str) -> float | None:
+        latencies = self.latencies[node]
+        if len(latencies) < self.min_samples:
+            return None
+        cut_points = statistics.quantiles(latencies, n=100)
+        index = min(max(round(self.policies[node] * 100), 1), 99) - 1
+        return cut_points[index]
+
+    def _can_fire(self) -> bool:
+        calls = sum(stats["calls"] for stats in self.stats.values())
+        fired = sum(stats["fired"] for stats in self.stats.values())
+        return fired < self.budget * calls
+
+    async def _timed(self, call: Callable[[], Awaitable]):
+        start = time.perf_counter()
+        result = await call()
+        return result, time.perf_counter() - start
+
+    async def _race(self, node: str, call: Callable[[], Awaitable]) -> tuple[Any, list]:
+        stats = self.stats[node]
+        stats["calls"] += 1
+        primary = asyncio.ensure_future(self._timed(call))
+
+        threshold = self.get_threshold(node)
+        if threshold is not None:
+            await asyncio.wait({primary}, timeout=threshold)
+        if primary.done() or threshold is None or not self._can_fire():
+            result, latency = await primary
+            self.latencies[node].append(latency)
+            return result, []
+
+        stats["fired"] += 1
+        hedge = asyncio.ensure_future(self._timed(call))
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # A failed request only loses if the other one can still win
+                winner = next((task for task in done if not task.exception()), None)
+                if winner is not None:
+                    break
+                if not pending:
+                    raise done.pop().exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if winner is hedge:
+            stats["won"] += 1
+        result, latency = winner.result()
+        self.latencies[node].append(latency)
+        # A loser that finished together with the winner was billed as well
+        discarded = [
+            task.result()[0] for task in done - {winner} if not task.exception()
+        ]
+        return result, discarded
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        # One long-lived loop, so the async HTTP clients are not bound to a loop
+        # that has been closed
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="counselor-hedging",
+                    daemon=True,
+                ).start()
+        return self._loop
+
+    def invoke(
+        self,
+        name: str,
+        call: Callable[[], Awaitable],
+        on_discarded: Callable[[Any], None] | None = None,
+    ):
+        """
+        Run an async call from sync code, hedged if its node has a policy.
+
+        The losing request of a hedge is cancelled. If it finished anyway, its
+        result is passed to on_discarded, on the calling thread.
+
+        Returns:
+            The result of whichever request finished first
+        """
+        node = self.get_policy(name)
+        if not node:
+            return asyncio.run_coroutine_threadsafe(call(), self._get_loop()).result()
+
+        result, discarded = asyncio.run_coroutine_threadsafe(
+            self._race(node, call), self._get_loop()
+        ).result()
+        if on_discarded is not None:
+            for loser in discarded:
+                on_discarded(loser)
+        return result
+
+    def report(self) -> dict[str, dict]:
+        """
+        Summarize hedging per node.
+
+        Returns:
+            dict[str, dict]: Calls, hedges fired and won, and the current
+            threshold in seconds, keyed by node name
+        """
+        return {
+            node: {**stats, "threshold_seconds": self.get_threshold(node)}
+            for node, stats in self.stats.items()
+        }
+
+
+HEDGER = RequestHedger(parse_hedged_nodes(HEDGED_NODES))
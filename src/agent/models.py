@@ -1,15 +1,25 @@
-from pydantic import BaseModel, Field
-from typing import List
+import operator
+import typing
+from functools import cache, reduce
+from types import UnionType
+
+from pydantic import BaseModel, Field, create_model
+from typing import ClassVar, List, Literal
 
 
 class StateModel(BaseModel):
-    pass
+    # Short descriptions for the compact schema, fields that are not listed
+    # are described by their name only
+    compact_descriptions: ClassVar[dict[str, str]] = {}
 
-    def get_attribute_with_values(self) -> str:
+    def get_attribute_with_values(self, compact: bool = False) -> str:
         """
         Generate a formatted string representation of the profile information
         that can be used as input to a prompt.
 
+        Args:
+            compact: Leave out fields without a value
+
         Returns:
             str: A formatted string containing all profile attributes and their values
         """
@@ -17,6 +27,8 @@ class StateModel(BaseModel):
 
         for field_name, field_info in self.__class__.model_fields.items():
             value = getattr(self, field_name)
+            if compact and value in (None, "", []):
+                continue
 
             # Format the field name to be more human-readable
             display_name = field_name.replace("_", " ").title()
@@ -31,23 +43,66 @@ class StateModel(BaseModel):
 
             lines.append(f"{display_name}: {formatted_value}")
 
+        if compact and not lines:
+            return "None"
         return "\n".join(lines)
 
-    def get_field_descriptions(self) -> str:
+    @classmethod
+    @cache
+    def get_field_descriptions(cls) -> str:
         """
-        Generate a simple field name and description list.
+        Generate a simple field name and description list, once per model class.
 
         Returns:
             str: A formatted string with field names and descriptions
         """
         lines = []
 
-        for field_name, field_info in self.__class__.model_fields.items():
-            lines.append(f'- "{field_name}": {field_info.description}')
+        for field_name, field_info in cls.model_fields.items():
+            if field_info.description:
+                lines.append(f'- "{field_name}": {field_info.description}')
+            else:
+                lines.append(f'- "{field_name}"')
 
         return "\n".join(lines)
 
 
+def get_compact_annotation(annotation):
+    # Swap models nested in lists and optionals for their compact variants
+    if isinstance(annotation, type) and issubclass(annotation, StateModel):
+        return get_compact_model(annotation)
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is list:
+        return list[get_compact_annotation(args[0])]
+    if origin in (typing.Union, UnionType):
+        return reduce(operator.or_, [get_compact_annotation(arg) for arg in args])
+    return annotation
+
+
+@cache
+def get_compact_model(model: type[StateModel]) -> type[StateModel]:
+    """
+    Build a variant of a model with minimal field descriptions, once per class.
+
+    The variant subclasses the model and keeps its name, so its JSON schema is
+    a shorter version of the same tool and its instances are still instances of
+    the model.
+
+    Returns:
+        type[StateModel]: The compact model class
+    """
+    fields = {}
+    for name, field_info in model.model_fields.items():
+        default = ... if field_info.is_required() else field_info.default
+        fields[name] = (
+            get_compact_annotation(field_info.annotation),
+            Field(default, description=model.compact_descriptions.get(name)),
+        )
+    return create_model(model.__name__, __base__=model, **fields)
+
+
 class ProfileInformation(StateModel):
     age: int | None = Field(default=None, description="The age of the user")
     interests: List[str] | None = Field(
@@ -69,29 +124,62 @@ class ProfileInformation(StateModel):
         description="Whether the profile is complete"
     )
 
+    compact_descriptions = {"is_locally_focused": "Prefers local opportunities"}
+
+
+ProfileField = Literal[
+    "age",
+    "interests",
+    "competencies",
+    "personal_characteristics",
+    "is_locally_focused",
+    "desired_job_characteristics",
+]
+
+
+class ProfileQuestion(StateModel):
+    field: ProfileField = Field(description="The profile field the question targets")
+    question: str = Field(description="The follow-up question to ask the user")
+
 
 class ProfileQuestions(StateModel):
     message: str | None = Field(
         description="A helpful message to summarise what information that is missing from the profile"
     )
-    questions: List[str] | None = Field(
-        default=None, description="Follow-up questions to clarify the user's profile"
+    questions: List[ProfileQuestion] | None = Field(
+        default=None,
+        description="Follow-up questions to clarify the user's profile, one per incomplete field",
     )
 
+    compact_descriptions = {
+        "message": "What the profile is missing",
+        "questions": "One per incomplete field",
+    }
 
-class JobRecommendations(StateModel):
-    job_role: List[str] | None = Field(
-        description="A list of recommended job roles that match the user's profile"
-    )
-    job_role_description: List[str] | None = Field(
-        description="A brief description of each recommended job role"
+
+class JobRecommendation(StateModel):
+    job_role: str = Field(description="The recommended job role")
+    job_role_description: str = Field(description="A brief description of the job role")
+    education: str | None = Field(
+        description="Educational paths or qualifications beneficial for the job role"
     )
-    education: List[str] | None = Field(
-        description="A list of educational paths or qualifications beneficial for each recommended job role"
+    profile_match: str = Field(
+        description="An explanation of why the job role is a good match for the user's profile"
     )
-    profile_match: List[str] = Field(
-        description="An explanation of why each job role is a good match for the user's profile"
+
+    compact_descriptions = {
+        "job_role_description": "Brief description",
+        "education": "Beneficial education paths",
+        "profile_match": "Why it matches the profile",
+    }
+
+
+class JobRecommendations(StateModel):
+    recommendations: List[JobRecommendation] = Field(
+        description="The recommended job roles that match the user's profile"
     )
     summary: str | None = Field(
         description="A summary of the job recommendations provided and the characteristics of the profile"
     )
+
+    compact_descriptions = {"summary": "Summary of the roles and the profile"}
@@ -0,0 +1,119 @@
+"""
+Input tokens per node with the full and the compact prompts.
+
+Each prompt is rendered for a profile early in a session and for a complete one,
+with the tool schema of its output model. Schema tokens are counted on its JSON,
+which approximates what the provider bills for a tool definition.
+
+    python -m agent.prompt_size   # from src/
+"""
+
+import json
+from collections.abc import Callable
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agent.models import ProfileInformation
+from agent.prompting import PromptLayout, get_compact_prompt
+from agent.prompts import (
+    FOLLOW_UP_QUESTION_PROMPT,
+    INDEXED_EDUCATION_JOB_RECOMMENDATIONS_PROMPT,
+    INDEXED_EDUCATION_MORE_JOB_RECOMMENDATIONS_PROMPT,
+    JOB_RECOMMENDATIONS_PROMPT,
+    MORE_JOB_RECOMMENDATIONS_PROMPT,
+    PROFILE_INFORMATION_PROMPT,
+)
+
+MEASURED_PROMPTS = [
+    PROFILE_INFORMATION_PROMPT,
+    FOLLOW_UP_QUESTION_PROMPT,
+    JOB_RECOMMENDATIONS_PROMPT,
+    INDEXED_EDUCATION_JOB_RECOMMENDATIONS_PROMPT,
+    MORE_JOB_RECOMMENDATIONS_PROMPT,
+    INDEXED_EDUCATION_MORE_JOB_RECOMMENDATIONS_PROMPT,
+]
+
+SAMPLE_PROFILES = {
+    "first_turn": ProfileInformation(interests=["drawing"], is_profile_complete=False),
+    "complete": ProfileInformation(
+        age=18,
+        interests=["math", "art", "music"],
+        competencies=["programming", "drawing"],
+        personal_characteristics=["creative", "curious"],
+        is_locally_focused=True,
+        desired_job_characteristics=["remote work", "small team"],
+        is_profile_complete=True,
+    ),
+}
+
+
+def get_tiktoken_counter(model: str = "gpt-4o-mini") -> Callable[[str], int]:
+    # tiktoken comes with langchain-openai, imported here as it loads its
+    # encoding files on first use
+    import tiktoken
+
+    encoding = tiktoken.encoding_for_model(model)
+    return lambda text: len(encoding.encode(text))
+
+
+def count_prompt_tokens(
+    prompt: PromptLayout,
+    profile: ProfileInformation,
+    compact: bool,
+    count_tokens: Callable[[str], int],
+) -> int:
+    """
+    Count the input tokens of one call with a prompt.
+
+    Returns:
+        int: Tokens of the messages and the output tool schema
+    """
+    if compact:
+        prompt = get_compact_prompt(prompt)
+    messages = prompt.format_messages(
+        user_input="I like drawing",
+        current_profile_information=profile.get_attribute_with_values(compact),
+        shown_job_roles="Graphic Designer\nIllustrator",
+        count=5,
+    )
+    schema = json.dumps(convert_to_openai_tool(prompt.output_model))
+    return sum(count_tokens(message.content) for message in messages) + count_tokens(
+        schema
+    )
+
+
+def measure_prompt_sizes(
+    count_tokens: Callable[[str], int] | None = None,
+) -> list[dict]:
+    """
+    Compare the input tokens of the full and the compact prompt of every node.
+
+    Returns:
+        list[dict]: Node, sample profile, full and compact tokens and the share
+        saved, one per prompt and sample profile
+    """
+    count_tokens = count_tokens or get_tiktoken_counter()
+    rows = []
+    for prompt in MEASURED_PROMPTS:
+        for sample, profile in SAMPLE_PROFILES.items():
+            full = count_prompt_tokens(prompt, profile, False, count_tokens)
+            compact = count_prompt_tokens(prompt, profile, True, count_tokens)
+            rows.append(
+                {
+                    "node": prompt.name,
+                    "profile": sample,
+                    "full_tokens": full,
+                    "compact_tokens": compact,
+                    "saved": (full - compact) / full,
+                }
+            )
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"{'node':<50} {'profile':<11} {'full':>6} {'compact':>8} {'saved':>6}")
+    for row in measure_prompt_sizes():
+        print(
+            f"{row['node']:<50} {row['profile']:<11} {row['full_tokens']:>6} "
+            f"{row['compact_tokens']:>8} {row['saved']:>6.1%}"
+        )
@@ -0,0 +1,134 @@
+from collections import deque
+from dataclasses import dataclass, field, replace
+from functools import cache, cached_property
+from inspect import cleandoc
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from agent.models import StateModel, get_compact_model
+
+
+@dataclass(frozen=True)
+class PromptLayout:
+    """
+    A prompt split into a stable system prefix and a variable user message.
+
+    The system prefix (role, instructions and output fields) never contains
+    per-turn content, so it is byte-identical across calls and can be served
+    from the provider's prompt cache. Everything that changes between turns
+    goes into the user message that follows it.
+    """
+
+    name: str
+    role: str
+    instructions: str
+    variable_template: str
+    output_model: type[StateModel]
+
+    @cached_property
+    def system_prefix(self) -> str:
+        """
+        Build the static system message for this prompt.
+
+        Returns:
+            str: Role, instructions and output field descriptions
+        """
+        return "\n\n".join(
+            [
+                cleandoc(self.role),
+                "Instructions:\n" + cleandoc(self.instructions),
+                "Output Fields:\n" + self.output_model.get_field_descriptions(),
+            ]
+        )
+
+    def format_messages(self, **variables) -> list[BaseMessage]:
+        """
+        Render the prompt as a system message followed by the variable content.
+
+        Args:
+            **variables: Values for the placeholders in the variable template
+
+        Returns:
+            list[BaseMessage]: The messages to send to the model
+        """
+        return [
+            SystemMessage(content=self.system_prefix),
+            HumanMessage(content=cleandoc(self.variable_template).format(**variables)),
+        ]
+
+
+@cache
+def get_compact_prompt(prompt: PromptLayout) -> PromptLayout:
+    """
+    Variant of a prompt with the compact output model, once per prompt.
+
+    Returns:
+        PromptLayout: The prompt with minimal output field descriptions
+    """
+    return replace(prompt, output_model=get_compact_model(prompt.output_model))
+
+
+@dataclass
+class CacheUsageRecord:
+    prompt_name: str
+    input_tokens: int
+    cached_tokens: int
+    output_tokens: int
+
+
+@dataclass
+class PromptCacheStats:
+    """Per-call record of how many input tokens were served from the cache."""
+
+    max_records: int = 1000
+    records: deque = field(init=False)
+
+    def __post_init__(self):
+        self.records = deque(maxlen=self.max_records)
+
+    def record(self, prompt_name: str, raw_message) -> CacheUsageRecord | None:
+        usage = getattr(raw_message, "usage_metadata", None)
+        if not usage:
+            return None
+
+        details = usage.get("input_token_details") or {}
+        record = CacheUsageRecord(
+            prompt_name=prompt_name,
+            input_tokens=usage.get("input_tokens", 0),
+            cached_tokens=details.get("cache_read", 0) or 0,
+            output_tokens=usage.get("output_tokens", 0),
+        )
+        self.records.append(record)
+        return record
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Aggregate the recorded calls per prompt.
+
+        Returns:
+            dict[str, dict]: Calls, input tokens, cached tokens and cache ratio
+            keyed by prompt name
+        """
+        totals: dict[str, dict] = {}
+        for record in self.records:
+            entry = totals.setdefault(
+                record.prompt_name,
+                {"calls": 0, "input_tokens": 0, "cached_tokens": 0},
+            )
+            entry["calls"] += 1
+            entry["input_tokens"] += record.input_tokens
+            entry["cached_tokens"] += record.cached_tokens
+
+        for entry in totals.values():
+            entry["cache_ratio"] = (
+                entry["cached_tokens"] / entry["input_tokens"]
+                if entry["input_tokens"]
+                else 0.0
+            )
+        return totals
+
+    def reset(self):
+        self.records.clear()
+
+
+PROMPT_CACHE_STATS = PromptCacheStats()
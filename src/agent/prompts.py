@@ -1,3 +1,8 @@
+from dataclasses import replace
+
+from agent.models import JobRecommendations, ProfileInformation, ProfileQuestions
+from agent.prompting import PromptLayout
+
 BASE_ROLE = """
     You are an expert in work, study counseling and understanding human profiles
     and how their characteristics can impact their career paths. You have a deep
@@ -5,50 +10,105 @@ BASE_ROLE = """
     You are tasked with creating a profile based on the user's input.
     """
 
-PROFILE_INFORMATION_PROMPT = (
-    BASE_ROLE
-    + """
+EDUCATION_INSTRUCTION = "- Provide the educational paths or qualifications that would be beneficial for each recommended job role."
+INDEXED_EDUCATION_INSTRUCTION = (
+    "- Set education to null, it is filled in from a database of education programmes."
+)
 
-    Instructions:
+# Each prompt keeps the role and instructions in a static system prefix so the
+# provider can cache it. Only the variable template changes between turns.
+PROFILE_INFORMATION_PROMPT = PromptLayout(
+    name="extract_profile_information",
+    role=BASE_ROLE,
+    instructions="""
     - Use the user's input together with the profile information to fill out and update the profile fields accurately.
     - Ensure that the profile is comprehensive and reflects the user's characteristics.
-
+    """,
+    variable_template="""
     Conversation History:
     {user_input}
 
     Current Profile Information:
     {current_profile_information}
-    """
+    """,
+    output_model=ProfileInformation,
 )
 
-FOLLOW_UP_QUESTION_PROMPT = (
-    BASE_ROLE
-    + """
-    Instructions:
+FOLLOW_UP_QUESTION_PROMPT = PromptLayout(
+    name="ask_profile_questions",
+    role=BASE_ROLE,
+    instructions="""
     - Based on the user's input and the profile information you've extracted, assess
     whether you have enough information to create a comprehensive profile.
     - If you need more information, generate a list of follow-up questions to ask the user. Ask one question
-    per field that is incomplete or unclear.
+    per field that is incomplete or unclear, and set the field each question targets.
     - Ask open questions that encourage the user to provide detailed responses.
-
+    """,
+    variable_template="""
     Current Profile Information:
     {current_profile_information}
-    """
+    """,
+    output_model=ProfileQuestions,
 )
 
-JOB_RECOMMENDATIONS_PROMPT = (
-    BASE_ROLE
-    + """
-    Instructions:
+JOB_RECOMMENDATIONS_PROMPT = PromptLayout(
+    name="get_job_recommendations",
+    role=BASE_ROLE,
+    instructions=f"""
     - Based on the user's profile information, recommend suitable job roles that align with their characteristics and preferences.
     - Suggest at least 10 job roles that fit the user's profile.
     - Be mindful of including a wide range of job roles that match different aspects of the user's profile
     - Do not rule out any job due to competencies, focus more on interests and personal characteristics
     - Provide a brief description of each recommended job role and explain why it is a good match for the user's profile.
-    - Provide a list of educational paths or qualifications that would be beneficial for each recommended job role.
+    {EDUCATION_INSTRUCTION}
     - Provide a summary of the personal profile and how it relates to the recommended job roles.
+    """,
+    variable_template="""
+    Profile Information:
+    {current_profile_information}
+    """,
+    output_model=JobRecommendations,
+)
 
+MORE_JOB_RECOMMENDATIONS_PROMPT = PromptLayout(
+    name="get_more_job_recommendations",
+    role=BASE_ROLE,
+    instructions=f"""
+    - The user has already seen a list of recommended job roles and wants to see more.
+    - Based on the user's profile information, suggest exactly the requested number of new job roles that fit the profile.
+    - Do not repeat or rephrase any of the job roles that have already been shown.
+    - Provide a brief description of each recommended job role and explain why it is a good match for the user's profile.
+    {EDUCATION_INSTRUCTION}
+    - Provide a short summary of how the new job roles relate to the profile.
+    """,
+    variable_template="""
     Profile Information:
     {current_profile_information}
-    """
+
+    Job Roles Already Shown:
+    {shown_job_roles}
+
+    Number of New Job Roles:
+    {count}
+    """,
+    output_model=JobRecommendations,
+)
+
+
+def without_generated_education(prompt: PromptLayout) -> PromptLayout:
+    """Variant of a recommendation prompt that leaves education to the programme index."""
+    return replace(
+        prompt,
+        name=f"{prompt.name}_indexed_education",
+        instructions=prompt.instructions.replace(
+            EDUCATION_INSTRUCTION, INDEXED_EDUCATION_INSTRUCTION
+        ),
+    )
+
+
+INDEXED_EDUCATION_JOB_RECOMMENDATIONS_PROMPT = without_generated_education(
+    JOB_RECOMMENDATIONS_PROMPT
+)
+INDEXED_EDUCATION_MORE_JOB_RECOMMENDATIONS_PROMPT = without_generated_education(
+    MORE_JOB_RECOMMENDATIONS_PROMPT
 )
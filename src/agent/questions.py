@@ -0,0 +1,41 @@
+from typing import get_args
+
+from agent.models import ProfileField, ProfileInformation, ProfileQuestions
+
+
+def get_missing_fields(profile: ProfileInformation) -> set[str]:
+    """
+    Find the profile fields that still need an answer.
+
+    Returns:
+        set[str]: Names of the fields that are None or empty
+    """
+    return {
+        field
+        for field in get_args(ProfileField)
+        if getattr(profile, field) in (None, [])
+    }
+
+
+def build_question_queue(response: ProfileQuestions) -> list[dict]:
+    return [question.model_dump() for question in response.questions or []]
+
+
+def get_open_questions(
+    queue: list[dict] | None, missing_fields: set[str]
+) -> list[dict]:
+    # A question is only invalidated once the field it targets has been filled
+    return [question for question in queue or [] if question["field"] in missing_fields]
+
+
+def needs_new_questions(queue: list[dict], missing_fields: set[str]) -> bool:
+    """
+    Decide whether the queue still covers the profile.
+
+    New questions are needed when the queue has run dry, or when the profile
+    changed so that a missing field no longer has a question targeting it.
+
+    Returns:
+        bool: Whether the LLM should generate a new queue
+    """
+    return not queue or bool(missing_fields - {question["field"] for question in queue})
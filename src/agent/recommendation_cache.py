@@ -0,0 +1,216 @@
+"""Cache of job recommendations keyed by normalized profile fingerprints."""
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from agent.models import JobRecommendations, ProfileInformation
+from config import (
+    RECOMMENDATION_CACHE_PATH,
+    RECOMMENDATION_CACHE_SIMILARITY,
+    RECOMMENDATION_CACHE_TTL_SECONDS,
+)
+
+PROFILE_LIST_FIELDS = [
+    "interests",
+    "competencies",
+    "personal_characteristics",
+    "desired_job_characteristics",
+]
+
+# Only the most recent entries are compared when looking for a similar profile
+MAX_SIMILARITY_CANDIDATES = 500
+
+
+def normalize_value(value: str) -> str:
+    words = re.findall(r"[a-z0-9]+", value.lower())
+    # Crude singularization, so "arts" and "art" end up the same
+    return " ".join(
+        word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words
+    )
+
+
+def get_canonical_profile(profile: ProfileInformation) -> dict:
+    """
+    Build a canonical form of the profile with sorted, normalized values.
+
+    Returns:
+        dict: The normalized profile fields used for fingerprinting
+    """
+    canonical = {
+        "age": profile.age,
+        "is_locally_focused": profile.is_locally_focused,
+    }
+    for field in PROFILE_LIST_FIELDS:
+        values = getattr(profile, field) or []
+        canonical[field] = sorted({normalize_value(v) for v in values} - {""})
+    return canonical
+
+
+def fingerprint_profile(profile: ProfileInformation) -> str:
+    canonical = json.dumps(get_canonical_profile(profile), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_profile_vector(profile: ProfileInformation) -> Counter:
+    canonical = get_canonical_profile(profile)
+    vector = Counter()
+    for field in PROFILE_LIST_FIELDS:
+        for value in canonical[field]:
+            vector.update(f"{field}:{word}" for word in value.split())
+    vector[f"age:{canonical['age']}"] += 1
+    vector[f"is_locally_focused:{canonical['is_locally_focused']}"] += 1
+    return vector
+
+
+def cosine_similarity(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[key] for key, count in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(
+        sum(v * v for v in b.values())
+    )
+    return dot / norm if norm else 0.0
+
+
+class RecommendationCache:
+    """
+    Serve stored JobRecommendations for profiles that were seen before.
+
+    Profiles are matched on an exact fingerprint of their normalized values.
+    With a similarity threshold below 1.0, a profile whose bag-of-words vector
+    is close enough to a stored one is also treated as a hit.
+    """
+
+    def __init__(
+        self,
+        path: str = RECOMMENDATION_CACHE_PATH,
+        ttl_seconds: float = RECOMMENDATION_CACHE_TTL_SECONDS,
+        similarity_threshold: float = RECOMMENDATION_CACHE_SIMILARITY,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recommendations (
+                    fingerprint TEXT PRIMARY KEY,
+                    vector TEXT NOT NULL,
+                    recommendations TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _find_similar(self, conn, profile: ProfileInformation, min_created_at: float):
+        vector = get_profile_vector(profile)
+        rows = conn.execute(
+            """
+            SELECT fingerprint, vector, recommendations FROM recommendations
+            WHERE created_at >= ? ORDER BY created_at DESC LIMIT ?
+            """,
+            (min_created_at, MAX_SIMILARITY_CANDIDATES),
+        ).fetchall()
+
+        best_row, best_score = None, self.similarity_threshold
+        for row in rows:
+            score = cosine_similarity(vector, Counter(json.loads(row[1])))
+            if score >= best_score:
+                best_row, best_score = row, score
+        return best_row
+
+    def get(self, profile: ProfileInformation) -> JobRecommendations | None:
+        min_created_at = time.time() - self.ttl_seconds
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT fingerprint, vector, recommendations FROM recommendations
+                WHERE fingerprint = ? AND created_at >= ?
+                """,
+                (fingerprint_profile(profile), min_created_at),
+            ).fetchone()
+
+            if row is not None:
+                self.hits += 1
+            elif self.similarity_threshold < 1.0:
+                row = self._find_similar(conn, profile, min_created_at)
+                if row is not None:
+                    self.similar_hits += 1
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            conn.execute(
+                "UPDATE recommendations SET hits = hits + 1 WHERE fingerprint = ?",
+                (row[0],),
+            )
+        return JobRecommendations.model_validate_json(row[2])
+
+    def put(self, profile: ProfileInformation, recommendations: JobRecommendations):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, 0)",
+                (
+                    fingerprint_profile(profile),
+                    json.dumps(get_profile_vector(profile)),
+                    recommendations.model_dump_json(),
+                    time.time(),
+                ),
+            )
+
+    def report(self) -> dict:
+        """
+        Summarize cache effectiveness for this process and the stored entries.
+
+        Returns:
+            dict: Hit counts, hit rate and the number of stored entries
+        """
+        lookups = self.hits + self.similar_hits + self.misses
+        with self._connect() as conn:
+            entries, stored_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM recommendations"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+            "entries": entries,
+            "stored_hits": stored_hits,
+        }
+
+
+recommendation_cache = None
+
+
+def get_recommendation_cache() -> RecommendationCache:
+    # Created lazily so importing the module does not touch the file system
+    global recommendation_cache
+    if recommendation_cache is None:
+        recommendation_cache = RecommendationCache()
+    return recommendation_cache
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_recommendation_cache().report(), indent=2))
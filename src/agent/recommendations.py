@@ -0,0 +1,116 @@
+import re
+
+from agent.gate import STOPWORDS
+from agent.models import JobRecommendations
+from agent.recommendation_cache import PROFILE_LIST_FIELDS, normalize_value
+
+# Number of new roles generated by each "show more" request
+RECOMMENDATION_PAGE_SIZE = 5
+
+# Changing these fields can affect every role, so they are not diffed
+WHOLE_PROFILE_FIELDS = ["age", "is_locally_focused"]
+
+
+def make_job_id(job_role: str) -> str:
+    """
+    Derive a stable id from a job role title.
+
+    The same title always maps to the same id, so a role suggested twice is
+    stored once and selections survive when more roles are added.
+
+    Returns:
+        str: A lowercase slug of the job role
+    """
+    return re.sub(r"[^a-z0-9]+", "-", job_role.lower()).strip("-")
+
+
+def merge_recommendations(
+    existing: dict[str, dict] | None, response: JobRecommendations
+) -> dict[str, dict]:
+    """
+    Add new recommendation records to the existing ones, keyed by job id.
+
+    Returns:
+        dict[str, dict]: All records in the order they were first recommended
+    """
+    records = dict(existing or {})
+    for recommendation in response.recommendations:
+        job_id = make_job_id(recommendation.job_role)
+        if job_id and job_id not in records:
+            records[job_id] = {"id": job_id, **recommendation.model_dump()}
+    return records
+
+
+def get_shown_job_roles(records: dict[str, dict] | None) -> list[str]:
+    return [record["job_role"] for record in (records or {}).values()]
+
+
+def get_terms(values: list[str]) -> set[str]:
+    return {
+        word
+        for value in values
+        for word in normalize_value(value).split()
+        if len(word) > 2 and word not in STOPWORDS
+    }
+
+
+def diff_profiles(previous: dict, current: dict) -> dict[str, dict[str, set[str]]]:
+    """
+    Compare two canonical profiles, see get_canonical_profile.
+
+    Returns:
+        dict[str, dict[str, set[str]]]: The added and removed values of each
+        changed list field, and an empty entry for each changed scalar field
+    """
+    changes = {}
+    for field in WHOLE_PROFILE_FIELDS:
+        if previous.get(field) != current.get(field):
+            changes[field] = {}
+    for field in PROFILE_LIST_FIELDS:
+        before, after = set(previous.get(field) or []), set(current.get(field) or [])
+        if before != after:
+            changes[field] = {"added": after - before, "removed": before - after}
+    return changes
+
+
+def find_stale_recommendations(
+    records: dict[str, dict], changes: dict[str, dict[str, set[str]]], current: dict
+) -> list[str]:
+    """
+    Re-score the existing roles against the profile values that changed.
+
+    A role is stale when its description or profile match relies at least as
+    much on removed values as on values the profile still has.
+
+    Returns:
+        list[str]: Ids of the records that should be replaced
+    """
+    current_terms = get_terms(
+        [value for field in PROFILE_LIST_FIELDS for value in current.get(field) or []]
+    )
+    removed_terms = (
+        get_terms(
+            [
+                value
+                for change in changes.values()
+                for value in change.get("removed", [])
+            ]
+        )
+        - current_terms
+    )
+    if not removed_terms:
+        return []
+
+    stale = []
+    for job_id, record in records.items():
+        record_terms = get_terms(
+            [
+                record["job_role"],
+                record.get("job_role_description") or "",
+                record.get("profile_match") or "",
+            ]
+        )
+        removed_hits = record_terms & removed_terms
+        if removed_hits and len(removed_hits) >= len(record_terms & current_terms):
+            stale.append(job_id)
+    return stale
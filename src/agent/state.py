@@ -8,20 +8,34 @@ class OverallState(TypedDict):
     messages: Annotated[list, add_messages]
     do_profiling: bool
 
-    # Fields that will be populated during profiling - make them optional
-    interests: Annotated[list, operator.add] | None
-    competencies: Annotated[list, operator.add] | None
-    personal_characteristics: Annotated[list, operator.add] | None
-    job_characteristics: Annotated[list, operator.add] | None
-    profile_questions: Annotated[list, operator.add] | None
+    # Fields that will be populated during profiling - make them optional.
+    # Extraction returns the full updated lists, so they replace the old ones
+    interests: list | None
+    competencies: list | None
+    personal_characteristics: list | None
+    job_characteristics: list | None
+    # Questions for display and the queue they are served from, one per field
+    profile_questions: list[str] | None
+    question_queue: list[dict] | None
     age: int | None
     is_locally_focused: bool | None
+    llm_calls_avoided: int | None
+    # User messages received so far, and how many of them the profile reflects,
+    # so entering a stage only extracts again when the user said something new
+    user_message_count: int | None
+    profiled_message_count: int | None
 
     # Fields that will be populated during job recommendation - make them optional
-    job_role: list[str] | None
-    job_role_description: list[str] | None
-    education: list[str] | None
-    profile_match: list[str] | None
+    # Recommendation records keyed by their stable job id
+    job_recommendations: dict[str, dict] | None
+    # Canonical profile the recommendations were made for, to diff against
+    recommendation_profile: dict | None
+
+    # Latency budget of the current turn, and whether its answer was degraded
+    deadline: float | None
+    degraded: bool | None
+    # Prompt and completion tokens used by the session so far
+    token_usage: dict[str, int] | None
 
 
 class ProfilingState(TypedDict):
@@ -33,11 +47,10 @@ class ProfilingState(TypedDict):
     is_locally_focused: bool | None
     desired_job_characteristics: Annotated[list, operator.add] | None
     do_profiling: bool  # Fixed typo: was "do_priofiling"
+    profiled_message_count: int | None
 
 
 class JobRecommendationState(TypedDict):
     messages: Annotated[list, add_messages]
-    job_role: list[str] | None
-    job_role_description: list[str] | None
-    education: list[str] | None
-    profile_match: list[str] | None
+    job_recommendations: dict[str, dict] | None
+    recommendation_profile: dict | None
@@ -1,20 +1,164 @@
+import time
+
 from agent.state import (
     OverallState,
     ProfilingState,
     JobRecommendationState,
 )
-from agent.models import ProfileInformation, ProfileQuestions, JobRecommendations
+from agent.models import JobRecommendations, ProfileInformation
 from langchain_openai import ChatOpenAI
+from openai import APITimeoutError
 from agent.prompts import (
     PROFILE_INFORMATION_PROMPT,
     FOLLOW_UP_QUESTION_PROMPT,
     JOB_RECOMMENDATIONS_PROMPT,
+    MORE_JOB_RECOMMENDATIONS_PROMPT,
+    INDEXED_EDUCATION_JOB_RECOMMENDATIONS_PROMPT,
+    INDEXED_EDUCATION_MORE_JOB_RECOMMENDATIONS_PROMPT,
+)
+from agent.recommendations import (
+    RECOMMENDATION_PAGE_SIZE,
+    WHOLE_PROFILE_FIELDS,
+    diff_profiles,
+    find_stale_recommendations,
+    get_shown_job_roles,
+    merge_recommendations,
+)
+from agent.recommendation_cache import get_canonical_profile, get_recommendation_cache
+from agent.education import fill_education
+from agent.deadline import (
+    TRANSIENT_ERRORS,
+    DeadlineExceeded,
+    get_remaining_seconds,
+    start_turn,
+)
+from agent.hedging import HEDGER
+from agent.coalescing import COALESCER, get_request_key
+from agent.budget import is_budget_step_active, record_usage
+from config import (
+    BUDGET_MODEL,
+    COMPACT_PROMPTS,
+    EDUCATION_FROM_INDEX,
+    RECOMMENDATION_CACHE_ENABLED,
+    TRANSCRIPT_WINDOW_SIZE,
+)
+from agent.prompting import PROMPT_CACHE_STATS, PromptLayout, get_compact_prompt
+from agent.validation import repair_structured_output
+from agent.questions import (
+    build_question_queue,
+    get_missing_fields,
+    get_open_questions,
+    needs_new_questions,
 )
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.types import interrupt
+
+
+# Upper bound on items per profile list so long sessions don't grow the state
+MAX_PROFILE_LIST_ITEMS = 15
+
+# Messages kept in the prompt history once a session nears its token budget
+SHORT_HISTORY_MESSAGES = 6
+
+# Retries of rate limited, failed or dropped requests under a turn deadline, as
+# many as the OpenAI client makes, and the wait before the first one
+TRANSIENT_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.5
+
+
+def get_llm(timeout: float | None = None):
+    # Under a turn deadline the client does not retry, run_structured does, with
+    # what is left of the turn
+    return ChatOpenAI(
+        model=BUDGET_MODEL if is_budget_step_active("cheaper_model") else "gpt-4o-mini",
+        temperature=0,
+        timeout=timeout,
+        max_retries=None if timeout is None else 0,
+    )
+
+
+def invoke_structured(prompt: PromptLayout, timeout: float | None = None, **variables):
+    llm = get_llm(timeout)  # Get LLM when needed
+    if COMPACT_PROMPTS:
+        prompt = get_compact_prompt(prompt)
+    messages = prompt.format_messages(**variables)
+
+    # Identical concurrent requests, like a double submitted turn or two
+    # sessions with the same profile, share one call to the provider
+    key = get_request_key(
+        llm.model_name,
+        prompt.name,
+        [(message.type, message.content) for message in messages],
+    )
+    deadline = None if timeout is None else time.time() + timeout
+    try:
+        return COALESCER.call(
+            key,
+            lambda: run_structured(llm, prompt, messages, variables, deadline),
+            timeout,
+        )
+    except TimeoutError as error:
+        raise DeadlineExceeded("No time left to wait for the shared request") from error
+
+
+def run_structured(
+    llm,
+    prompt: PromptLayout,
+    messages: list,
+    variables: dict,
+    deadline: float | None = None,
+):
+    for attempt in range(TRANSIENT_RETRIES + 1):
+        try:
+            response = request_structured(llm, prompt, messages)
+            break
+        except TRANSIENT_ERRORS as error:
+            # Without a deadline the client retries on its own. A timed out
+            # request already used up the time there was
+            if (
+                deadline is None
+                or isinstance(error, APITimeoutError)
+                or attempt == TRANSIENT_RETRIES
+            ):
+                raise
+            backoff = RETRY_BACKOFF_SECONDS * 2**attempt
+            time.sleep(max(min(backoff, deadline - time.time()), 0))
+            llm = get_llm(get_remaining_seconds({"deadline": deadline}))
+
+    # Keep track of how much of the static prefix was served from the cache.
+    # Callers that joined the request did not use any tokens
+    PROMPT_CACHE_STATS.record(prompt.name, response["raw"])
+    record_usage(response["raw"])
+
+    if response["parsing_error"] is None:
+        return response["parsed"]
 
+    # The repair only gets what is left of the timeout, and is skipped when
+    # nothing is left
+    if deadline is not None:
+        llm = get_llm(get_remaining_seconds({"deadline": deadline}))
 
-def get_llm():
-    return ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    # Keep the valid fields and re-request only the missing or invalid ones
+    parsed, repair_raw = repair_structured_output(
+        llm, prompt.output_model, variables, response["raw"]
+    )
+    if repair_raw is not None:
+        PROMPT_CACHE_STATS.record(f"{prompt.name}_repair", repair_raw)
+        record_usage(repair_raw)
+    return parsed
+
+
+def request_structured(llm, prompt: PromptLayout, messages: list) -> dict:
+    structured_llm = llm.with_structured_output(prompt.output_model, include_raw=True)
+    if HEDGER.get_policy(prompt.name):
+        # Slow calls get a duplicate request, the first response wins
+        return HEDGER.invoke(
+            prompt.name,
+            lambda: structured_llm.ainvoke(messages),
+            # A losing request that finished is billed as well
+            on_discarded=lambda discarded: record_usage(discarded["raw"]),
+        )
+    return structured_llm.invoke(messages)
 
 
 def get_current_profile_information(state: OverallState) -> ProfileInformation:
@@ -24,13 +168,33 @@ def get_current_profile_information(state: OverallState) -> ProfileInformation:
         competencies=state.get("competencies", []),
         personal_characteristics=state.get("personal_characteristics", []),
         is_locally_focused=state.get("is_locally_focused"),
-        job_characteristics=state.get("job_characteristics", []),
+        # OverallState calls the field job_characteristics, ProfilingState
+        # desired_job_characteristics
+        desired_job_characteristics=state.get("job_characteristics")
+        or state.get("desired_job_characteristics", []),
         is_profile_complete=state.get("is_profile_complete"),
     )
 
 
+def format_profile(profile: ProfileInformation) -> str:
+    return profile.get_attribute_with_values(compact=COMPACT_PROMPTS)
+
+
+def bound_profile_list(values: list[str] | None) -> list[str] | None:
+    if values is None:
+        return None
+
+    # Drop case-insensitive duplicates and cap the number of items
+    unique_values = {}
+    for value in values:
+        unique_values.setdefault(value.strip().lower(), value.strip())
+    return list(unique_values.values())[:MAX_PROFILE_LIST_ITEMS]
+
+
 def get_conversation_history(state: OverallState) -> str:
     messages = state["messages"]
+    if is_budget_step_active("short_history"):
+        messages = messages[-SHORT_HISTORY_MESSAGES:]
 
     # Extract and format user messages
     user_messages = []
@@ -47,18 +211,58 @@ def get_conversation_history(state: OverallState) -> str:
     return "\n".join(user_messages) if user_messages else "No previous conversation"
 
 
+def start_user_turn(state: OverallState) -> OverallState:
+    """
+    Start a turn that brings a new user message.
+
+    Returns:
+        OverallState: A fresh turn deadline and the new count of user messages
+    """
+    return {
+        **start_turn(state),
+        "user_message_count": (state.get("user_message_count") or 0) + 1,
+    }
+
+
+def wait_for_user_input(state: OverallState) -> OverallState:
+    """
+    Pause the thread until the user replies, then start the turn.
+
+    The reply is the value the thread is resumed with, either the message text
+    or a dict with "content" and optionally "do_profiling".
+
+    Returns:
+        OverallState: The user message, the start of the turn and, if given,
+        the profiling flag
+    """
+    reply = interrupt({"waiting_for": "user_input"})
+    if isinstance(reply, str):
+        reply = {"content": reply}
+
+    # Only the most recent messages stay in the thread, like in the transcript
+    # window, so it does not grow with the conversation
+    stale = state.get("messages", [])[: -(TRANSCRIPT_WINDOW_SIZE - 1) or None]
+    update = {
+        "messages": [RemoveMessage(id=message.id) for message in stale]
+        + [HumanMessage(content=reply["content"])],
+        **start_user_turn(state),
+    }
+    if "do_profiling" in reply:
+        update["do_profiling"] = reply["do_profiling"]
+    return update
+
+
 def extract_profile_information(state: OverallState) -> ProfilingState:
     # Extract and format user messages
     user_input_text = get_conversation_history(state)
     current_profile_info = get_current_profile_information(state)
 
-    llm = get_llm()  # Get LLM when needed
-    structured_llm = llm.with_structured_output(ProfileInformation)
-    formatted_prompt = PROFILE_INFORMATION_PROMPT.format(
+    structured_response = invoke_structured(
+        PROFILE_INFORMATION_PROMPT,
+        timeout=get_remaining_seconds(state),
         user_input=user_input_text,
-        current_profile_information=current_profile_info.get_attribute_with_values(),
+        current_profile_information=format_profile(current_profile_info),
     )
-    structured_response = structured_llm.invoke(formatted_prompt)
 
     # Check if profile is complete by verifying no null values
     profile_dict = structured_response.model_dump()
@@ -75,46 +279,204 @@ def extract_profile_information(state: OverallState) -> ProfilingState:
     return {
         "messages": [AIMessage(content=message)],
         "age": structured_response.age,
-        "interests": structured_response.interests,
-        "competencies": structured_response.competencies,
-        "personal_characteristics": structured_response.personal_characteristics,
-        "job_characteristics": structured_response.desired_job_characteristics,
+        "interests": bound_profile_list(structured_response.interests),
+        "competencies": bound_profile_list(structured_response.competencies),
+        "personal_characteristics": bound_profile_list(
+            structured_response.personal_characteristics
+        ),
+        "job_characteristics": bound_profile_list(
+            structured_response.desired_job_characteristics
+        ),
         "is_locally_focused": structured_response.is_locally_focused,
         "do_profiling": not structured_response.is_profile_complete,
+        "profiled_message_count": state.get("user_message_count"),
+    }
+
+
+def refresh_profile_information(state: OverallState) -> OverallState:
+    # Brings the profile up to date before another stage runs. The user chose
+    # that stage, so an incomplete profile does not send them back to profiling
+    update = extract_profile_information(state)
+    return {
+        key: value
+        for key, value in update.items()
+        if key not in ("messages", "do_profiling")
     }
 
 
-def ask_profile_questions(state: ProfilingState) -> OverallState:
-    llm = get_llm()  # Get LLM when needed
-    structured_llm = llm.with_structured_output(ProfileQuestions)
+def ask_profile_questions(state: OverallState) -> OverallState:
     current_profile_info = get_current_profile_information(state)
+    missing_fields = get_missing_fields(current_profile_info)
+    queue = get_open_questions(state.get("question_queue"), missing_fields)
 
-    formatted_prompt = FOLLOW_UP_QUESTION_PROMPT.format(
-        current_profile_information=current_profile_info.get_attribute_with_values(),
-    )
+    # Close to the token budget, the remaining queue is used up first and no
+    # new questions are generated
+    regenerate = needs_new_questions(queue, missing_fields)
+    if regenerate and is_budget_step_active("no_new_questions"):
+        regenerate = False
+        if not queue:
+            return reuse_queued_questions(state)
+
+    if regenerate:
+        structured_response = invoke_structured(
+            FOLLOW_UP_QUESTION_PROMPT,
+            timeout=get_remaining_seconds(state),
+            current_profile_information=format_profile(current_profile_info),
+        )
+        queue = get_open_questions(
+            build_question_queue(structured_response), missing_fields
+        )
+        message = structured_response.message
+        llm_calls_avoided = state.get("llm_calls_avoided") or 0
+    else:
+        # Serve the next queued question without calling the LLM
+        message = f"Thanks, that helps! {queue[0]['question']}"
+        llm_calls_avoided = (state.get("llm_calls_avoided") or 0) + 1
+
+    return {
+        "messages": [AIMessage(content=message)],
+        "question_queue": queue,
+        "profile_questions": [question["question"] for question in queue],
+        "llm_calls_avoided": llm_calls_avoided,
+    }
+
+
+def invoke_recommendations(
+    prompt: PromptLayout, indexed_education_prompt: PromptLayout, **variables
+) -> JobRecommendations:
+    if not EDUCATION_FROM_INDEX:
+        return invoke_structured(prompt, **variables)
+
+    # Education comes from the programme index, so the LLM does not write it
+    return fill_education(invoke_structured(indexed_education_prompt, **variables))
+
+
+def get_job_recommendations(state: OverallState) -> JobRecommendationState:
+    current_profile_info = get_current_profile_information(state)
+    profile_snapshot = get_canonical_profile(current_profile_info)
+
+    # With recommendations for an earlier version of the profile, only the
+    # roles affected by the changes are replaced
+    previous_snapshot = state.get("recommendation_profile")
+    if state.get("job_recommendations") and previous_snapshot:
+        changes = diff_profiles(previous_snapshot, profile_snapshot)
+        if not any(field in changes for field in WHOLE_PROFILE_FIELDS):
+            return update_job_recommendations(state, changes, profile_snapshot)
+
+    # Near-identical profiles are served the recommendations generated before
+    cache = get_recommendation_cache() if RECOMMENDATION_CACHE_ENABLED else None
+    structured_response = cache.get(current_profile_info) if cache else None
+    if structured_response is None:
+        structured_response = invoke_recommendations(
+            JOB_RECOMMENDATIONS_PROMPT,
+            INDEXED_EDUCATION_JOB_RECOMMENDATIONS_PROMPT,
+            timeout=get_remaining_seconds(state),
+            current_profile_information=format_profile(current_profile_info),
+        )
+        if cache:
+            cache.put(current_profile_info, structured_response)
+
+    return {
+        "messages": [AIMessage(content=structured_response.summary)],
+        "job_recommendations": merge_recommendations(None, structured_response),
+        "recommendation_profile": profile_snapshot,
+    }
+
+
+def update_job_recommendations(
+    state: ProfilingState, changes: dict, profile_snapshot: dict
+) -> JobRecommendationState:
+    existing = state["job_recommendations"]
+    stale = find_stale_recommendations(existing, changes, profile_snapshot)
+    kept = {job_id: r for job_id, r in existing.items() if job_id not in stale}
+
+    # Only stale roles are replaced, so the list keeps its size. Roles for new
+    # values come with the next page the user asks for
+    count = len(stale)
+    if not count:
+        return {
+            "messages": [
+                AIMessage(content="Your job recommendations still fit your profile.")
+            ],
+            "job_recommendations": kept,
+            "recommendation_profile": profile_snapshot,
+            "llm_calls_avoided": (state.get("llm_calls_avoided") or 0) + 1,
+        }
 
-    structured_response = structured_llm.invoke(formatted_prompt)
+    structured_response = invoke_recommendations(
+        MORE_JOB_RECOMMENDATIONS_PROMPT,
+        INDEXED_EDUCATION_MORE_JOB_RECOMMENDATIONS_PROMPT,
+        timeout=get_remaining_seconds(state),
+        current_profile_information=format_profile(
+            get_current_profile_information(state)
+        ),
+        # Stale roles are listed too, so they are not suggested again
+        shown_job_roles="\n".join(get_shown_job_roles(existing)),
+        count=count,
+    )
 
     return {
-        "messages": [AIMessage(content=structured_response.message)],
-        "profile_questions": structured_response.questions,
+        "messages": [AIMessage(content=structured_response.summary)],
+        "job_recommendations": merge_recommendations(kept, structured_response),
+        "recommendation_profile": profile_snapshot,
     }
 
 
-def get_job_recommendations(state: ProfilingState) -> JobRecommendationState:
-    llm = get_llm()
-    structured_llm = llm.with_structured_output(JobRecommendations)
+def get_more_job_recommendations(state: OverallState) -> JobRecommendationState:
     current_profile_info = get_current_profile_information(state)
+    existing = state.get("job_recommendations") or {}
 
-    formatted_prompt = JOB_RECOMMENDATIONS_PROMPT.format(
-        current_profile_information=current_profile_info.get_attribute_with_values(),
+    structured_response = invoke_recommendations(
+        MORE_JOB_RECOMMENDATIONS_PROMPT,
+        INDEXED_EDUCATION_MORE_JOB_RECOMMENDATIONS_PROMPT,
+        timeout=get_remaining_seconds(state),
+        current_profile_information=format_profile(current_profile_info),
+        shown_job_roles="\n".join(get_shown_job_roles(existing)),
+        count=RECOMMENDATION_PAGE_SIZE,
     )
-    structured_response = structured_llm.invoke(formatted_prompt)
 
     return {
         "messages": [AIMessage(content=structured_response.summary)],
-        "job_role": structured_response.job_role,
-        "job_role_description": structured_response.job_role_description,
-        "education": structured_response.education,
-        "profile_match": structured_response.profile_match,
+        "job_recommendations": merge_recommendations(existing, structured_response),
+    }
+
+
+# Degraded responses for when a node runs out of time or tokens
+
+
+def keep_profile_information(state: OverallState) -> OverallState:
+    # The profile stays as it was, the input is picked up again next turn
+    return {
+        "messages": [
+            AIMessage(
+                content="I couldn't update your profile this time, so I kept it "
+                "as it was for now."
+            )
+        ]
     }
+
+
+def reuse_queued_questions(state: OverallState) -> OverallState:
+    missing_fields = get_missing_fields(get_current_profile_information(state))
+    queue = get_open_questions(state.get("question_queue"), missing_fields)
+    if not queue:
+        message = "Could you tell me a bit more about yourself in the meantime?"
+    else:
+        message = f"In the meantime, could you tell me: {queue[0]['question']}"
+
+    return {"messages": [AIMessage(content=message)], "question_queue": queue}
+
+
+def keep_job_recommendations(state: OverallState) -> JobRecommendationState:
+    # Records generated in earlier turns stay in the state untouched
+    if state.get("job_recommendations"):
+        message = (
+            "I couldn't look for new job recommendations right now, "
+            "here are the ones found so far."
+        )
+    else:
+        message = (
+            "I couldn't look for job recommendations right now. "
+            "Please try again in a moment."
+        )
+    return {"messages": [AIMessage(content=message)]}
@@ -0,0 +1,213 @@
+"""Compact, bounded conversation storage shared by all sessions in a process."""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from config import SESSION_IDLE_SECONDS, TRANSCRIPT_ARCHIVE_DIR, TRANSCRIPT_WINDOW_SIZE
+
+
+class MessageRecord:
+    __slots__ = ("content", "role")
+
+    def __init__(self, role: str, content: str):
+        self.role = role
+        self.content = content
+
+    def to_message(self) -> BaseMessage:
+        if self.role == "user":
+            return HumanMessage(content=self.content)
+        return AIMessage(content=self.content)
+
+    def to_dict(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+
+class SessionTranscript:
+    __slots__ = ("last_access", "window")
+
+    def __init__(self, records: list[MessageRecord] | None = None):
+        self.window = deque(records or [])
+        self.last_access = time.monotonic()
+
+
+class MessageStore:
+    """
+    One message store for every session in the process.
+
+    Each session keeps only its most recent messages in memory. Older messages
+    are appended to a JSON-lines archive on disk, and idle sessions are released
+    from memory entirely until they are used again.
+    """
+
+    def __init__(
+        self,
+        archive_dir: str = TRANSCRIPT_ARCHIVE_DIR,
+        window_size: int = TRANSCRIPT_WINDOW_SIZE,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+    ):
+        self.archive_dir = Path(archive_dir)
+        self.window_size = window_size
+        self.idle_seconds = idle_seconds
+        self._sessions: dict[str, SessionTranscript] = {}
+        self._lock = threading.Lock()
+
+    def _archive_path(self, session_id: str) -> Path:
+        return self.archive_dir / f"{session_id}.jsonl"
+
+    def _snapshot_path(self, session_id: str) -> Path:
+        return self.archive_dir / f"{session_id}.window.json"
+
+    def _write_archive(self, session_id: str, records: list[MessageRecord]):
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        with self._archive_path(session_id).open("a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record.to_dict()) + "\n")
+
+    def _get(self, session_id: str) -> SessionTranscript:
+        transcript = self._sessions.get(session_id)
+        if transcript is None:
+            # Restore the window of a released session from its snapshot
+            records = []
+            snapshot = self._snapshot_path(session_id)
+            if snapshot.exists():
+                records = [MessageRecord(**m) for m in json.loads(snapshot.read_text())]
+                snapshot.unlink()
+            transcript = self._sessions[session_id] = SessionTranscript(records)
+        transcript.last_access = time.monotonic()
+        return transcript
+
+    def append(self, session_id: str, role: str, content: str):
+        with self._lock:
+            transcript = self._get(session_id)
+            transcript.window.append(MessageRecord(role, content))
+
+            overflow = []
+            while len(transcript.window) > self.window_size:
+                overflow.append(transcript.window.popleft())
+            if overflow:
+                self._write_archive(session_id, overflow)
+
+    def last(self, session_id: str) -> MessageRecord | None:
+        with self._lock:
+            window = self._get(session_id).window
+            return window[-1] if window else None
+
+    def to_messages(self, session_id: str) -> list[BaseMessage]:
+        """
+        Build LangChain messages for the in-memory window of a session.
+
+        Returns:
+            list[BaseMessage]: The most recent messages, oldest first
+        """
+        with self._lock:
+            return [record.to_message() for record in self._get(session_id).window]
+
+    def iter_history(self, session_id: str) -> Iterator[MessageRecord]:
+        """
+        Iterate over the full conversation, streaming archived messages from disk.
+
+        Yields:
+            MessageRecord: Every message of the session, oldest first
+        """
+        archive = self._archive_path(session_id)
+        if archive.exists():
+            with archive.open(encoding="utf-8") as f:
+                for line in f:
+                    yield MessageRecord(**json.loads(line))
+
+        with self._lock:
+            window = list(self._get(session_id).window)
+        yield from window
+
+    def release(self, session_id: str):
+        with self._lock:
+            transcript = self._sessions.pop(session_id, None)
+            if transcript is None or not transcript.window:
+                return
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            self._snapshot_path(session_id).write_text(
+                json.dumps([record.to_dict() for record in transcript.window])
+            )
+
+    def release_idle(self) -> list[str]:
+        """
+        Move sessions that have been idle for too long out of memory.
+
+        Returns:
+            list[str]: The ids of the released sessions
+        """
+        cutoff = time.monotonic() - self.idle_seconds
+        idle = [
+            session_id
+            for session_id, transcript in list(self._sessions.items())
+            if transcript.last_access < cutoff
+        ]
+        for session_id in idle:
+            self.release(session_id)
+        return idle
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._archive_path(session_id).unlink(missing_ok=True)
+            self._snapshot_path(session_id).unlink(missing_ok=True)
+
+    def memory_report(self) -> dict[str, int]:
+        """
+        Estimate the resident bytes of each session's message window.
+
+        Only the transcripts are counted, see get_deep_size for the rest of a
+        session's state.
+
+        Returns:
+            dict[str, int]: Approximate bytes per session id
+        """
+        with self._lock:
+            return {
+                session_id: sys.getsizeof(transcript)
+                + sys.getsizeof(transcript.window)
+                + sum(
+                    sys.getsizeof(record) + sys.getsizeof(record.content)
+                    for record in transcript.window
+                )
+                for session_id, transcript in self._sessions.items()
+            }
+
+
+def get_deep_size(value) -> int:
+    """
+    Estimate the resident bytes of a value and everything it holds.
+
+    Containers, messages and other objects with attributes are followed, each
+    object is counted once.
+
+    Returns:
+        int: Approximate bytes
+    """
+    seen = set()
+    stack = [value]
+    size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.append(vars(item))
+    return size
+
+
+MESSAGE_STORE = MessageStore()
@@ -0,0 +1,173 @@
+"""Field-level repair of structured output that failed validation."""
+
+import json
+import typing
+from functools import cache
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+
+REPAIR_INSTRUCTIONS = """
+An earlier answer to a request with the inputs below had missing or invalid
+fields. Provide only the requested fields, based on the inputs and consistent
+with the fields of the answer that were valid.
+"""
+
+REPAIR_STATS = {"repairs": 0, "fields_repaired": 0}
+
+
+@cache
+def get_field_validators(model: type[BaseModel]) -> dict[str, TypeAdapter]:
+    """
+    Compile one validator per field of a model, once per model class.
+
+    Returns:
+        dict[str, TypeAdapter]: Validators keyed by field name
+    """
+    return {
+        name: TypeAdapter(field_info.annotation)
+        for name, field_info in model.model_fields.items()
+    }
+
+
+@cache
+def get_item_validator(model: type[BaseModel], name: str) -> TypeAdapter | None:
+    # List fields of records are validated item by item, so one bad record
+    # does not invalidate the others
+    annotation = model.model_fields[name].annotation
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if typing.get_origin(candidate) is list:
+            (item_type,) = typing.get_args(candidate)
+            if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+                return TypeAdapter(item_type)
+    return None
+
+
+@cache
+def get_repair_model(
+    model: type[BaseModel], field_names: tuple[str, ...]
+) -> type[BaseModel]:
+    """
+    Build a model with only the given fields of another model.
+
+    Returns:
+        type[BaseModel]: A model class for the fields that need repairing
+    """
+    fields = {
+        name: (model.model_fields[name].annotation, model.model_fields[name])
+        for name in field_names
+    }
+    return create_model(f"{model.__name__}Repair", **fields)
+
+
+def get_raw_output(raw_message) -> dict:
+    """
+    Recover the unvalidated output from the raw model response.
+
+    Returns:
+        dict: The output arguments, or an empty dict if nothing can be parsed
+    """
+    tool_calls = getattr(raw_message, "tool_calls", None)
+    if tool_calls:
+        return tool_calls[0].get("args") or {}
+
+    try:
+        data = json.loads(getattr(raw_message, "content", "") or "")
+    except (TypeError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def partial_validate(
+    model: type[BaseModel], data: dict
+) -> tuple[dict[str, typing.Any], list[str]]:
+    """
+    Validate each field on its own and keep those that pass.
+
+    Returns:
+        tuple[dict, list[str]]: The valid field values and the names of the
+        fields that are missing or invalid
+    """
+    valid, invalid = {}, []
+    for name, validator in get_field_validators(model).items():
+        if name not in data:
+            if model.model_fields[name].is_required():
+                invalid.append(name)
+            continue
+
+        try:
+            valid[name] = validator.validate_python(data[name])
+            continue
+        except ValidationError:
+            pass
+
+        item_validator = get_item_validator(model, name)
+        items = []
+        if item_validator is not None and isinstance(data[name], list):
+            for item in data[name]:
+                try:
+                    items.append(item_validator.validate_python(item))
+                except ValidationError:
+                    pass
+        if items:
+            valid[name] = items
+        else:
+            invalid.append(name)
+
+    return valid, invalid
+
+
+def get_repair_messages(
+    variables: dict, valid: dict, invalid: list[str]
+) -> list[BaseMessage]:
+    """
+    Build a small prompt for the fields that need repairing.
+
+    The original system prompt is left out. The repair model's schema
+    describes the fields, and the inputs of the request and the valid fields
+    are all they depend on.
+
+    Returns:
+        list[BaseMessage]: The repair instructions and request
+    """
+    inputs = "\n\n".join(f"{name}:\n{value}" for name, value in variables.items())
+    valid_json = json.dumps(
+        valid, default=lambda value: value.model_dump(), separators=(",", ":")
+    )
+    return [
+        SystemMessage(content=REPAIR_INSTRUCTIONS.strip()),
+        HumanMessage(
+            content=(
+                f"Inputs:\n{inputs}\n\n"
+                f"Valid fields:\n{valid_json}\n\n"
+                f"Provide only these fields: {', '.join(invalid)}"
+            )
+        ),
+    ]
+
+
+def repair_structured_output(llm, model: type[BaseModel], variables: dict, raw_message):
+    """
+    Keep the valid fields of a failed response and re-request only the rest.
+
+    Returns:
+        tuple[BaseModel, object]: The repaired output and the raw repair
+        response, which is None if no repair call was needed
+    """
+    valid, invalid = partial_validate(model, get_raw_output(raw_message))
+    if not invalid:
+        return model.model_validate(valid), None
+
+    repair_model = get_repair_model(model, tuple(invalid))
+    response = llm.with_structured_output(repair_model, include_raw=True).invoke(
+        get_repair_messages(variables, valid, invalid)
+    )
+    if response["parsing_error"] is not None:
+        raise response["parsing_error"]
+
+    REPAIR_STATS["repairs"] += 1
+    REPAIR_STATS["fields_repaired"] += len(invalid)
+
+    for name in invalid:
+        valid[name] = getattr(response["parsed"], name)
+    return model.model_validate(valid), response["raw"]
@@ -0,0 +1,261 @@
+"""
+ASGI service that drives the counselor graph over HTTP.
+
+Endpoints:
+    POST /sessions                                 Create a session
+    GET  /sessions/{thread_id}                     Current session state
+    POST /sessions/{thread_id}/messages            Run a turn, return the new state
+    POST /sessions/{thread_id}/messages/stream     Run a turn as Server-Sent Events
+    GET  /sessions/{thread_id}/recommendations     Current job recommendations
+    POST /sessions/{thread_id}/recommendations     Enter the recommendation stage
+    POST /sessions/{thread_id}/recommendations/more  Add the next page of roles
+
+Run it with any ASGI server, for example:
+    uvicorn api.app:app --app-dir src --workers 4
+"""
+
+import asyncio
+import json
+import re
+
+from agent.event_log import TurnLogger, serialize_message
+from agent.graph import graph, more_job_recommendations, recommendation_graph
+from api.sessions import SessionConflictError, SessionNotFoundError, SessionStore
+
+store = None
+
+
+def get_store() -> SessionStore:
+    # Created lazily so every worker process opens its own connections
+    global store
+    if store is None:
+        store = SessionStore()
+    return store
+
+
+def serialize_update(update: dict) -> dict:
+    return {
+        key: [serialize_message(m) for m in value] if key == "messages" else value
+        for key, value in (update or {}).items()
+    }
+
+
+def apply_update(state: dict, update: dict):
+    # Same merge rule as the Streamlit app: append messages, replace the rest
+    for key, value in serialize_update(update).items():
+        if key == "messages":
+            state.setdefault("messages", []).extend(value)
+        else:
+            state[key] = value
+
+
+async def run_turn(thread_id: str, state: dict, content: str):
+    """
+    Run one user turn through the graph, merging updates into the state.
+
+    Yields:
+        tuple[str, dict]: Event name and payload for each node update or token
+    """
+    turn_log = TurnLogger(thread_id, state, content)
+    state.setdefault("messages", []).append({"role": "user", "content": content})
+
+    error = None
+    try:
+        async for mode, chunk in graph.astream(
+            state, stream_mode=["updates", "messages"]
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if message.content:
+                    yield (
+                        "token",
+                        {
+                            "node": metadata.get("langgraph_node"),
+                            "content": message.content,
+                        },
+                    )
+                continue
+
+            for node_name, update in chunk.items():
+                turn_log.node(node_name, update)
+                apply_update(state, update)
+                yield "node", {"node": node_name, "update": serialize_update(update)}
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        turn_log.end(error)
+
+
+async def read_json(receive) -> dict:
+    body = b""
+    more_body = True
+    while more_body:
+        event = await receive()
+        body += event.get("body", b"")
+        more_body = event.get("more_body", False)
+    return json.loads(body) if body else {}
+
+
+async def send_json(send, status: int, payload: dict):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+async def create_session(scope, receive, send):
+    thread_id = get_store().create()
+    await send_json(send, 201, {"thread_id": thread_id})
+
+
+async def get_session(scope, receive, send, thread_id: str):
+    state, _ = get_store().load(thread_id)
+    await send_json(send, 200, {"thread_id": thread_id, "state": state})
+
+
+async def get_recommendations(scope, receive, send, thread_id: str):
+    state, _ = get_store().load(thread_id)
+    records = state.get("job_recommendations") or {}
+    await send_json(send, 200, {"recommendations": list(records.values())})
+
+
+async def post_recommendations(scope, receive, send, thread_id: str):
+    state, version = get_store().load(thread_id)
+    state["do_profiling"] = False
+    async for update in recommendation_graph.astream(state):
+        for value in update.values():
+            apply_update(state, value)
+    get_store().save(thread_id, state, version)
+
+    await send_json(send, 200, {"thread_id": thread_id, "state": state})
+
+
+async def post_more_recommendations(scope, receive, send, thread_id: str):
+    state, version = get_store().load(thread_id)
+    update = await asyncio.to_thread(more_job_recommendations, state)
+    apply_update(state, update)
+    get_store().save(thread_id, state, version)
+
+    records = state.get("job_recommendations") or {}
+    await send_json(send, 200, {"recommendations": list(records.values())})
+
+
+async def load_turn(receive, send, thread_id: str) -> tuple[dict, int, str] | None:
+    try:
+        body = await read_json(receive)
+    except json.JSONDecodeError:
+        body = None
+    if not isinstance(body, dict):
+        await send_json(send, 400, {"error": "Body must be a JSON object"})
+        return None
+    if not body.get("content"):
+        await send_json(send, 400, {"error": "Field 'content' is required"})
+        return None
+
+    state, version = get_store().load(thread_id)
+    # Clients switch stages by sending the profiling flag along with the message
+    if "do_profiling" in body:
+        state["do_profiling"] = bool(body["do_profiling"])
+    return state, version, body["content"]
+
+
+async def post_message(scope, receive, send, thread_id: str):
+    turn = await load_turn(receive, send, thread_id)
+    if turn is None:
+        return
+
+    state, version, content = turn
+    async for _ in run_turn(thread_id, state, content):
+        pass
+    get_store().save(thread_id, state, version)
+
+    await send_json(send, 200, {"thread_id": thread_id, "state": state})
+
+
+async def stream_message(scope, receive, send, thread_id: str):
+    turn = await load_turn(receive, send, thread_id)
+    if turn is None:
+        return
+
+    state, version, content = turn
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+            ],
+        }
+    )
+
+    async def send_event(event: str, payload: dict, more_body: bool = True):
+        data = f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        await send(
+            {
+                "type": "http.response.body",
+                "body": data.encode(),
+                "more_body": more_body,
+            }
+        )
+
+    try:
+        async for event, payload in run_turn(thread_id, state, content):
+            await send_event(event, payload)
+        get_store().save(thread_id, state, version)
+    except SessionConflictError:
+        await send_event("error", {"error": "Session was updated concurrently"}, False)
+        return
+
+    await send_event("done", {"thread_id": thread_id, "state": state}, False)
+
+
+SESSION_PATH = r"^/sessions/(?P<thread_id>[0-9a-f]+)"
+
+ROUTES = [
+    ("POST", re.compile(r"^/sessions$"), create_session),
+    ("GET", re.compile(SESSION_PATH + r"$"), get_session),
+    ("POST", re.compile(SESSION_PATH + r"/messages$"), post_message),
+    ("POST", re.compile(SESSION_PATH + r"/messages/stream$"), stream_message),
+    ("GET", re.compile(SESSION_PATH + r"/recommendations$"), get_recommendations),
+    ("POST", re.compile(SESSION_PATH + r"/recommendations$"), post_recommendations),
+    (
+        "POST",
+        re.compile(SESSION_PATH + r"/recommendations/more$"),
+        post_more_recommendations,
+    ),
+]
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    for method, pattern, handler in ROUTES:
+        match = pattern.match(scope["path"])
+        if match and scope["method"] == method:
+            try:
+                await handler(scope, receive, send, **match.groupdict())
+            except SessionNotFoundError:
+                await send_json(send, 404, {"error": "Session not found"})
+            except SessionConflictError:
+                await send_json(
+                    send, 409, {"error": "Session was updated concurrently"}
+                )
+            return
+
+    await send_json(send, 404, {"error": "Not found"})
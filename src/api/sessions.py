@@ -0,0 +1,87 @@
+"""SQLite-backed session store for the HTTP API."""
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+from config import SESSION_DB_PATH
+
+
+class SessionNotFoundError(KeyError):
+    pass
+
+
+class SessionConflictError(RuntimeError):
+    """Raised when another worker saved the session since it was loaded."""
+
+
+def new_session_state() -> dict:
+    return {"messages": [], "do_profiling": True}
+
+
+class SessionStore:
+    """
+    Persist graph state per thread_id so any worker process can serve a session.
+
+    Every operation opens its own connection, which keeps the store safe to use
+    from several processes. Saves are guarded by a version number, so two
+    workers handling the same thread_id cannot silently overwrite each other.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    thread_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self) -> str:
+        thread_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions VALUES (?, ?, 0, ?)",
+                (thread_id, json.dumps(new_session_state()), time.time()),
+            )
+        return thread_id
+
+    def load(self, thread_id: str) -> tuple[dict, int]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, version FROM sessions WHERE thread_id = ?",
+                (thread_id,),
+            ).fetchone()
+        if row is None:
+            raise SessionNotFoundError(thread_id)
+        return json.loads(row[0]), row[1]
+
+    def save(self, thread_id: str, state: dict, version: int) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE sessions SET state = ?, version = version + 1, updated_at = ?
+                WHERE thread_id = ? AND version = ?
+                """,
+                (json.dumps(state), time.time(), thread_id, version),
+            )
+        if cursor.rowcount == 0:
+            raise SessionConflictError(thread_id)
+        return version + 1
@@ -4,3 +4,58 @@ from dotenv import load_dotenv
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Where the HTTP API keeps session state, shared by all worker processes
+SESSION_DB_PATH = os.getenv("COUNSELOR_SESSION_DB", "sessions.sqlite3")
+
+# Bounded per-session conversation memory
+TRANSCRIPT_ARCHIVE_DIR = os.getenv("COUNSELOR_TRANSCRIPT_DIR", ".transcripts")
+TRANSCRIPT_WINDOW_SIZE = int(os.getenv("COUNSELOR_TRANSCRIPT_WINDOW", "20"))
+SESSION_IDLE_SECONDS = float(os.getenv("COUNSELOR_SESSION_IDLE_SECONDS", "1800"))
+
+# Recommendation cache keyed by normalized profile fingerprints, off unless
+# RECOMMENDATION_CACHE_ENABLED=1
+RECOMMENDATION_CACHE_ENABLED = os.getenv("RECOMMENDATION_CACHE_ENABLED", "0") == "1"
+RECOMMENDATION_CACHE_PATH = os.getenv(
+    "RECOMMENDATION_CACHE_PATH", ".cache/recommendations.sqlite3"
+)
+RECOMMENDATION_CACHE_TTL_SECONDS = float(
+    os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+)
+# Below 1.0, similar (not only identical) profiles are served from the cache
+RECOMMENDATION_CACHE_SIMILARITY = float(
+    os.getenv("RECOMMENDATION_CACHE_SIMILARITY", "1.0")
+)
+
+# Fill the education of job recommendations from the bundled programme index
+# instead of having the LLM generate it
+EDUCATION_FROM_INDEX = os.getenv("EDUCATION_FROM_INDEX", "1") == "1"
+
+# Append-only event log of graph turns, empty COUNSELOR_EVENT_LOG_DIR disables it
+EVENT_LOG_DIR = os.getenv("COUNSELOR_EVENT_LOG_DIR", ".events")
+EVENT_LOG_MAX_BYTES = int(os.getenv("COUNSELOR_EVENT_LOG_MAX_BYTES", str(16 * 2**20)))
+EVENT_LOG_MAX_FILES = int(os.getenv("COUNSELOR_EVENT_LOG_MAX_FILES", "20"))
+
+# Latency budget of one turn through the graph, 0 disables the deadline
+TURN_DEADLINE_SECONDS = float(os.getenv("COUNSELOR_TURN_DEADLINE_SECONDS", "60"))
+
+# Hedged LLM requests per node, e.g. "get_job_recommendations:0.9" hedges calls
+# slower than the node's rolling p90. Hedges are capped at a fraction of calls
+HEDGED_NODES = os.getenv("COUNSELOR_HEDGED_NODES", "")
+HEDGE_BUDGET = float(os.getenv("COUNSELOR_HEDGE_BUDGET", "0.1"))
+
+# Send output schemas with minimal field descriptions and leave empty profile
+# fields out of prompts, see python -m agent.prompt_size for the savings
+COMPACT_PROMPTS = os.getenv("COUNSELOR_COMPACT_PROMPTS", "0") == "1"
+
+# Identical concurrent LLM requests share one in-flight call
+COALESCE_LLM_CALLS = os.getenv("COUNSELOR_COALESCE_LLM_CALLS", "1") == "1"
+
+# Token budgets per session and per day, 0 disables a budget. Sessions move to a
+# cheaper model, a shorter history and no new questions as they near a budget
+SESSION_INPUT_TOKEN_BUDGET = int(os.getenv("SESSION_INPUT_TOKEN_BUDGET", "300000"))
+SESSION_OUTPUT_TOKEN_BUDGET = int(os.getenv("SESSION_OUTPUT_TOKEN_BUDGET", "30000"))
+DAILY_INPUT_TOKEN_BUDGET = int(os.getenv("DAILY_INPUT_TOKEN_BUDGET", "20000000"))
+DAILY_OUTPUT_TOKEN_BUDGET = int(os.getenv("DAILY_OUTPUT_TOKEN_BUDGET", "2000000"))
+BUDGET_MODEL = os.getenv("BUDGET_MODEL", "gpt-4.1-nano")
+TOKEN_USAGE_PATH = os.getenv("TOKEN_USAGE_PATH", ".cache/token_usage.sqlite3")
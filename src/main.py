@@ -1,42 +1,193 @@
+import argparse
+import json
+import sys
+import uuid
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.utils.json import parse_partial_json
+
+from agent.event_log import TurnLogger, get_state_delta
 from agent.graph import graph
+from profiling import enable_profiling, profile_turn
+
+OUTPUT_MODES = ["updates", "tokens", "jsonl", "quiet"]
+
+# Fields of the structured LLM output that hold text for the user
+STREAMED_TEXT_FIELDS = ("message", "summary")
+
+
+class TextFieldStreamer:
+    """Pick the user-facing text out of structured output while it streams in."""
+
+    def __init__(self):
+        self.buffers = {}
+        self.printed = {}
+
+    def feed(self, run_id: str, content: str) -> str:
+        """
+        Add a chunk of streamed JSON output.
+
+        Returns:
+            str: Text of the message or summary field that was not returned yet
+        """
+        buffer = self.buffers[run_id] = self.buffers.get(run_id, "") + content
+        # Skip parsing until one of the text fields has started
+        if not any(f'"{name}"' in buffer for name in STREAMED_TEXT_FIELDS):
+            return ""
+
+        partial = parse_partial_json(buffer)
+        if not isinstance(partial, dict):
+            return ""
+        text = next(
+            (
+                partial[name]
+                for name in STREAMED_TEXT_FIELDS
+                if isinstance(partial.get(name), str)
+            ),
+            "",
+        )
+        new_text = text[self.printed.get(run_id, 0) :]
+        self.printed[run_id] = len(text)
+        return new_text
+
+
+def write_jsonl(event: dict):
+    print(json.dumps(event, separators=(",", ":"), default=str), flush=True)
 
 
-def stream_graph_updates(current_state: dict, user_input: str):
+def print_update(node_name: str, delta: dict):
+    print(f"[{node_name}]")
+    for key, value in delta.items():
+        if key == "messages":
+            for message in value:
+                print(f"Assistant: {message['content']}")
+        else:
+            print(f"  {key}: {value}")
+
+
+def apply_update(state: dict, update: dict):
+    # Append new messages, replace everything else
+    for key, value in update.items():
+        if key == "messages":
+            state.setdefault("messages", []).extend(value or [])
+        else:
+            state[key] = value
+
+
+def stream_graph_updates(
+    session_id: str, current_state: dict, user_input: str, output: str = "updates"
+):
+    turn_log = TurnLogger(session_id, current_state, user_input)
+
     # Add the new user message to the existing state
     if "messages" not in current_state:
         current_state["messages"] = []
 
     current_state["messages"].append({"role": "user", "content": user_input})
 
-    # Stream updates starting from the current state
-    for event in graph.stream(current_state):
-        # Display the state information for each event
-        print(f"State: {event}")
-        for node_name, value in event.items():
-            print(f"Node '{node_name}' output:")
-            if "messages" in value and value["messages"]:
-                print("Assistant:", value["messages"][-1].content)
-            else:
-                print(f"Value: {value}")
-            # Update the current state with the new values
-            current_state.update(value)
-        print("-" * 50)  # Separator for clarity
+    streamer = TextFieldStreamer()
+    streamed_nodes = set()
+    last_message = None
+
+    # Stream updates starting from the current state. Only the tokens mode asks
+    # for LLM tokens, the others get one event per finished node
+    stream_mode = ["updates", "messages"] if output == "tokens" else ["updates"]
+    error = None
+    try:
+        for mode, chunk in graph.stream(current_state, stream_mode=stream_mode):
+            if mode == "messages":
+                message, metadata = chunk
+                if isinstance(message, AIMessageChunk) and message.content:
+                    text = streamer.feed(message.id, message.content)
+                    if text:
+                        node_name = metadata.get("langgraph_node")
+                        if node_name not in streamed_nodes:
+                            print("Assistant: ", end="")
+                            streamed_nodes.add(node_name)
+                        print(text, end="", flush=True)
+                continue
+
+            for node_name, value in chunk.items():
+                turn_log.node(node_name, value)
+                delta = get_state_delta(current_state, value)
+                apply_update(current_state, value)
+                if delta.get("messages"):
+                    last_message = delta["messages"][-1]["content"]
+
+                if output == "updates":
+                    print_update(node_name, delta)
+                elif output == "jsonl":
+                    write_jsonl({"type": "node", "node": node_name, "delta": delta})
+                elif output == "tokens":
+                    if node_name in streamed_nodes:
+                        # The text was already printed token by token
+                        print()
+                    else:
+                        for message in delta.get("messages", []):
+                            print(f"Assistant: {message['content']}")
+
+        if output == "jsonl":
+            write_jsonl(
+                {
+                    "type": "done",
+                    "message": last_message,
+                    "degraded": bool(current_state.get("degraded")),
+                }
+            )
+        elif output == "quiet":
+            print(last_message or "", flush=True)
+        elif current_state.get("degraded"):
+            print("Note: this turn ran out of time, the answer is degraded.")
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        turn_log.end(error)
 
     return current_state
 
 
 if __name__ == "__main__":
-    print("Study and Work Counselor - Type 'quit', 'exit', or 'q' to stop")
-    print("=" * 60)
+    parser = argparse.ArgumentParser(description="Study and Work Counselor CLI")
+    parser.add_argument(
+        "--profile-dir",
+        help="Write per-turn CPU and memory profiles to this directory",
+    )
+    parser.add_argument(
+        "--output",
+        choices=OUTPUT_MODES,
+        default="updates",
+        help="updates: changed state per node, tokens: stream assistant text, "
+        "jsonl: one JSON object per node and turn, quiet: final answer only",
+    )
+    args = parser.parse_args()
+    enable_profiling(args.profile_dir)
+
+    # Banners and prompts are left out when the output is read by a program, or
+    # the input comes from a pipe
+    interactive = sys.stdin.isatty() and args.output not in ("jsonl", "quiet")
+    if interactive:
+        print("Study and Work Counselor - Type 'quit', 'exit', or 'q' to stop")
+        print("=" * 60)
 
     # Initialize persistent state
+    session_id = uuid.uuid4().hex
     conversation_state = {}
 
     while True:
-        user_input = input("\nUser: ")
+        try:
+            user_input = input("\nUser: " if interactive else "")
+        except EOFError:
+            break
+        if not user_input.strip():
+            continue
         if user_input.lower() in ["quit", "exit", "q"]:
-            print("Goodbye!")
+            if interactive:
+                print("Goodbye!")
             break
 
         # Update the state with the new input and get the updated state back
-        conversation_state = stream_graph_updates(conversation_state, user_input)
+        with profile_turn("cli_turn"):
+            conversation_state = stream_graph_updates(
+                session_id, conversation_state, user_input, args.output
+            )
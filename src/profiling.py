@@ -0,0 +1,134 @@
+"""
+Opt-in per-turn CPU and memory profiling.
+
+Enable it with the COUNSELOR_PROFILE_DIR environment variable or the
+--profile-dir flag of src/main.py and the Streamlit app. Each profiled turn
+writes three files to that directory:
+
+    <turn>.folded     Sampled stacks in collapsed format, for flamegraph.pl or
+                      speedscope
+    <turn>.alloc.txt  Largest allocations by line, from tracemalloc
+    <turn>.json       Wall time, sample count and peak traced memory
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from itertools import count
+from pathlib import Path
+
+SAMPLE_INTERVAL_SECONDS = 0.005
+TOP_ALLOCATIONS = 30
+
+profile_dir = os.getenv("COUNSELOR_PROFILE_DIR") or None
+turn_counter = count(1)
+
+
+def enable_profiling(directory: str | None):
+    """Turn profiling on for the rest of the process, e.g. from a CLI flag."""
+    global profile_dir
+    if directory:
+        profile_dir = directory
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Periodically record the stack of every other thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        super().__init__(name="counselor-profiler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        thread_names = {}
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if thread_id not in thread_names:
+                    thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+                stack = []
+                while frame is not None:
+                    stack.append(format_frame(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def write_profile(
+    label: str, sampler: StackSampler, snapshot, peak_bytes: int, wall_time: float
+):
+    directory = Path(profile_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{next(turn_counter):04d}-{label}"
+
+    with (directory / f"{name}.folded").open("w") as f:
+        for stack, samples in sampler.stacks.most_common():
+            f.write(f"{stack} {samples}\n")
+
+    with (directory / f"{name}.alloc.txt").open("w") as f:
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            f.write(f"{stat}\n")
+
+    (directory / f"{name}.json").write_text(
+        json.dumps(
+            {
+                "label": label,
+                "wall_time_seconds": wall_time,
+                "samples": sampler.samples,
+                "sample_interval_seconds": sampler.interval,
+                "peak_traced_bytes": peak_bytes,
+            },
+            indent=2,
+        )
+    )
+
+
+@contextmanager
+def profile_turn(label: str):
+    """
+    Profile the wrapped block if profiling is enabled.
+
+    When profiling is off this only checks a module-level flag, so it is safe to
+    leave around every turn.
+    """
+    if not profile_dir:
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    sampler = StackSampler()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - start
+        sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        write_profile(label, sampler, snapshot, peak_bytes, wall_time)
@@ -0,0 +1,23 @@
+import pytest
+
+import agent.budget
+import agent.recommendation_cache
+from agent.budget import DailyTokenUsage
+from agent.recommendation_cache import RecommendationCache
+
+
+@pytest.fixture(autouse=True)
+def local_stores(tmp_path_factory, monkeypatch):
+    # Tests never touch the cache files of the working directory. The files go
+    # to a directory of their own, tests may expect tmp_path to be empty
+    stores = tmp_path_factory.mktemp("stores")
+    monkeypatch.setattr(
+        agent.recommendation_cache,
+        "recommendation_cache",
+        RecommendationCache(str(stores / "recommendations.sqlite3")),
+    )
+    monkeypatch.setattr(
+        agent.budget,
+        "daily_usage",
+        DailyTokenUsage(str(stores / "token_usage.sqlite3")),
+    )
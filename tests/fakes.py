@@ -0,0 +1,91 @@
+import json
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import ValidationError
+
+
+class FakeStructuredLLM:
+    def __init__(self, llm, schema):
+        self.llm = llm
+        self.schema = schema
+
+    def invoke(self, messages):
+        self.llm.calls.append((self.schema, messages))
+        content = self.llm.responses.pop(0)
+        raw = AIMessage(content=json.dumps(content))
+        try:
+            return {
+                "raw": raw,
+                "parsed": self.schema.model_validate(content),
+                "parsing_error": None,
+            }
+        except ValidationError as e:
+            return {"raw": raw, "parsed": None, "parsing_error": e}
+
+
+class FakeLLM:
+    model_name = "fake"
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def with_structured_output(self, schema, include_raw=False):
+        return FakeStructuredLLM(self, schema)
+
+
+class SlowLLM(FakeLLM):
+    """Fake LLM whose calls take a while, for deadlines and concurrent calls."""
+
+    def __init__(self, seconds: float, *responses):
+        super().__init__(*responses)
+        self.seconds = seconds
+
+    def with_structured_output(self, schema, include_raw=False):
+        structured = super().with_structured_output(schema, include_raw)
+        invoke = structured.invoke
+
+        def slow_invoke(messages):
+            time.sleep(self.seconds)
+            return invoke(messages)
+
+        structured.invoke = slow_invoke
+        return structured
+
+
+class FlakyLLM(FakeLLM):
+    """Fake LLM whose first calls raise the given errors, one per call."""
+
+    def __init__(self, errors: list[Exception], *responses):
+        super().__init__(*responses)
+        self.errors = list(errors)
+
+    def with_structured_output(self, schema, include_raw=False):
+        structured = super().with_structured_output(schema, include_raw)
+        invoke = structured.invoke
+
+        def flaky_invoke(messages):
+            if self.errors:
+                self.calls.append((schema, messages))
+                raise self.errors.pop(0)
+            return invoke(messages)
+
+        structured.invoke = flaky_invoke
+        return structured
+
+
+def get_profiled_state(*user_messages: str) -> dict:
+    return {
+        "messages": [
+            HumanMessage(content="I like math and art, I am creative"),
+            AIMessage(content="Profile information extracted successfully."),
+        ]
+        + [HumanMessage(content=message) for message in user_messages],
+        "do_profiling": True,
+        "age": 18,
+        "interests": ["math", "art"],
+        "personal_characteristics": ["creative"],
+        "is_locally_focused": None,
+        "profile_questions": ["Would you like to work locally or abroad?"],
+    }
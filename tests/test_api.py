@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+import agent.event_log
+import api.app
+from agent.event_log import EventLog
+from api.sessions import SessionConflictError, SessionStore
+
+
+class FakeGraph:
+    async def astream(self, state, stream_mode):
+        yield "messages", (AIMessage(content="Hel"), {"langgraph_node": "fake"})
+        yield (
+            "updates",
+            {
+                "fake": {
+                    "messages": [AIMessage(content="Hello!")],
+                    "job_recommendations": {
+                        "data-analyst": {
+                            "id": "data-analyst",
+                            "job_role": "Data Analyst",
+                        }
+                    },
+                }
+            },
+        )
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(api.app, "store", SessionStore(str(tmp_path / "sessions.db")))
+    monkeypatch.setattr(api.app, "graph", FakeGraph())
+    monkeypatch.setattr(
+        agent.event_log, "event_log", EventLog(str(tmp_path / "events"))
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=api.app.app), base_url="http://test"
+    )
+
+
+def test_session_roundtrip(client):
+    async def scenario():
+        thread_id = (await client.post("/sessions")).json()["thread_id"]
+        response = await client.post(
+            f"/sessions/{thread_id}/messages", json={"content": "Hi"}
+        )
+        recommendations = await client.get(f"/sessions/{thread_id}/recommendations")
+        return response, recommendations
+
+    response, recommendations = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert response.json()["state"]["messages"] == [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello!"},
+    ]
+    assert recommendations.json()["recommendations"][0]["id"] == "data-analyst"
+
+
+def test_stream_emits_tokens_and_node_updates(client):
+    async def scenario():
+        thread_id = (await client.post("/sessions")).json()["thread_id"]
+        return await client.post(
+            f"/sessions/{thread_id}/messages/stream", json={"content": "Hi"}
+        )
+
+    response = asyncio.run(scenario())
+
+    assert response.headers["content-type"] == "text/event-stream"
+    assert "event: token" in response.text
+    assert "event: node" in response.text
+    assert "event: done" in response.text
+
+
+def test_entering_recommendations_stops_profiling(client, monkeypatch):
+    class FakeRecommendationGraph:
+        async def astream(self, state):
+            assert state["do_profiling"] is False
+            yield {
+                "get_job_recommendations": {
+                    "job_recommendations": {"chef": {"id": "chef"}}
+                }
+            }
+
+    monkeypatch.setattr(api.app, "recommendation_graph", FakeRecommendationGraph())
+
+    async def scenario():
+        thread_id = (await client.post("/sessions")).json()["thread_id"]
+        response = await client.post(f"/sessions/{thread_id}/recommendations")
+        session = await client.get(f"/sessions/{thread_id}")
+        return response, session
+
+    response, session = asyncio.run(scenario())
+
+    assert response.json()["state"]["job_recommendations"] == {"chef": {"id": "chef"}}
+    assert session.json()["state"]["do_profiling"] is False
+
+
+def test_malformed_body_returns_400(client):
+    async def scenario():
+        thread_id = (await client.post("/sessions")).json()["thread_id"]
+        return [
+            await client.post(f"/sessions/{thread_id}/messages", content=body)
+            for body in (b"{not json", b'["Hi"]')
+        ]
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [400, 400]
+
+
+def test_unknown_session_returns_404(client):
+    response = asyncio.run(client.get("/sessions/abc123"))
+
+    assert response.status_code == 404
+
+
+def test_store_rejects_stale_version(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    thread_id = store.create()
+    state, version = store.load(thread_id)
+    store.save(thread_id, state, version)
+
+    with pytest.raises(SessionConflictError):
+        store.save(thread_id, state, version)
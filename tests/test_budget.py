@@ -0,0 +1,112 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+import agent.budget
+import agent.tasks
+from agent.budget import (
+    BudgetExceeded,
+    is_budget_step_active,
+    record_usage,
+    with_token_budget,
+)
+from agent.deadline import DeadlineExceeded
+from agent.graph import guard_node
+from agent.tasks import ask_profile_questions, keep_profile_information
+
+
+@pytest.fixture(autouse=True)
+def budgets(monkeypatch):
+    monkeypatch.setattr(agent.budget, "SESSION_INPUT_TOKEN_BUDGET", 1000)
+    monkeypatch.setattr(agent.budget, "SESSION_OUTPUT_TOKEN_BUDGET", 100)
+    monkeypatch.setattr(agent.budget, "DAILY_INPUT_TOKEN_BUDGET", 0)
+    monkeypatch.setattr(agent.budget, "DAILY_OUTPUT_TOKEN_BUDGET", 0)
+
+
+def usage(input_tokens: int, output_tokens: int) -> dict:
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens}
+
+
+def record_call(input_tokens: int, output_tokens: int):
+    record_usage(
+        AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+    )
+
+
+def test_node_usage_is_added_to_session_and_day():
+    def node(state):
+        record_call(100, 10)
+        return {"messages": []}
+
+    update = with_token_budget(node)({"token_usage": usage(200, 20)})
+
+    assert update["token_usage"] == usage(300, 30)
+    assert agent.budget.get_daily_usage().get() == usage(100, 10)
+
+
+def test_usage_of_a_failed_node_is_kept():
+    def node(state):
+        record_call(100, 10)
+        raise DeadlineExceeded("The repair call ran out of time")
+
+    update = guard_node(node, keep_profile_information)({"token_usage": usage(200, 20)})
+
+    assert update["degraded"] is True
+    assert update["token_usage"] == usage(300, 30)
+    assert agent.budget.get_daily_usage().get() == usage(100, 10)
+
+
+def test_degradation_steps_follow_budget_use():
+    steps = []
+
+    def node(state):
+        steps.append(
+            [
+                step
+                for step in ("cheaper_model", "short_history", "no_new_questions")
+                if is_budget_step_active(step)
+            ]
+        )
+        return {}
+
+    for output_tokens in (10, 60, 80, 95):
+        with_token_budget(node)({"token_usage": usage(0, output_tokens)})
+
+    assert steps == [
+        [],
+        ["cheaper_model"],
+        ["cheaper_model", "short_history"],
+        ["cheaper_model", "short_history", "no_new_questions"],
+    ]
+    assert not is_budget_step_active("cheaper_model")
+
+
+def test_exhausted_budget_refuses_node_and_falls_back():
+    def node(state):
+        raise AssertionError("The node should not run over budget")
+
+    with pytest.raises(BudgetExceeded):
+        with_token_budget(node)({"token_usage": usage(1000, 0)})
+
+    update = guard_node(node, keep_profile_information)({"token_usage": usage(1000, 0)})
+    assert update["degraded"] is True
+
+
+def test_no_new_questions_near_budget(monkeypatch):
+    def fail_invoke_structured(prompt, **variables):
+        raise AssertionError("No new questions should be generated")
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fail_invoke_structured)
+
+    update = with_token_budget(ask_profile_questions)(
+        {"messages": [], "token_usage": usage(0, 95)}
+    )
+
+    assert update["question_queue"] == []
+    assert update["messages"][0].content
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import agent.event_log
+import main
+from agent.event_log import EventLog, iter_events
+from main import TextFieldStreamer, stream_graph_updates
+
+
+class FakeGraph:
+    def stream(self, state, stream_mode):
+        if "messages" in stream_mode:
+            for content in ['{"questions": [], "mess', 'age": "How ', 'old are you?"}']:
+                chunk = AIMessageChunk(content=content, id="run-1")
+                yield "messages", (chunk, {"langgraph_node": "ask"})
+        yield "updates", {"start": {"age": None}}
+        yield (
+            "updates",
+            {"ask": {"age": 30, "messages": [AIMessage(content="How old are you?")]}},
+        )
+
+
+def run_turn(monkeypatch, tmp_path, output: str) -> dict:
+    monkeypatch.setattr(main, "graph", FakeGraph())
+    monkeypatch.setattr(agent.event_log, "event_log", EventLog(str(tmp_path)))
+    return stream_graph_updates("session", {"age": None}, "Hi", output)
+
+
+def test_text_field_streamer_returns_only_new_text():
+    streamer = TextFieldStreamer()
+
+    assert streamer.feed("a", '{"recommendations": [{"job_role": "x"}], ') == ""
+    assert streamer.feed("a", '"summary": "Gre') == "Gre"
+    assert streamer.feed("a", 'at fit"}') == "at fit"
+
+
+def test_quiet_prints_only_final_message(monkeypatch, tmp_path, capsys):
+    state = run_turn(monkeypatch, tmp_path, "quiet")
+
+    assert capsys.readouterr().out == "How old are you?\n"
+    assert [
+        m["content"] if isinstance(m, dict) else m.content for m in state["messages"]
+    ] == ["Hi", "How old are you?"]
+
+
+def test_jsonl_writes_deltas_only(monkeypatch, tmp_path, capsys):
+    run_turn(monkeypatch, tmp_path, "jsonl")
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert events[0] == {"type": "node", "node": "start", "delta": {}}
+    assert events[1]["delta"]["age"] == 30
+    assert events[-1] == {
+        "type": "done",
+        "message": "How old are you?",
+        "degraded": False,
+    }
+
+
+def test_tokens_streams_assistant_text(monkeypatch, tmp_path, capsys):
+    run_turn(monkeypatch, tmp_path, "tokens")
+
+    assert capsys.readouterr().out == "Assistant: How old are you?\n"
+
+
+def test_failed_turn_is_logged(monkeypatch, tmp_path):
+    class FailingGraph:
+        def stream(self, state, stream_mode):
+            yield "updates", {"start": {"age": None}}
+            raise RuntimeError("Provider down")
+
+    log = EventLog(str(tmp_path))
+    monkeypatch.setattr(main, "graph", FailingGraph())
+    monkeypatch.setattr(agent.event_log, "event_log", log)
+
+    with pytest.raises(RuntimeError):
+        stream_graph_updates("session", {}, "Hi", "quiet")
+    log.close()
+
+    end = list(iter_events(tmp_path, "session"))[-1]
+    assert end["type"] == "end"
+    assert "Provider down" in end["error"]
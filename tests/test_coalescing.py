@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import agent.tasks
+from agent.coalescing import SingleFlight, get_request_key
+from agent.deadline import DeadlineExceeded
+from agent.prompts import JOB_RECOMMENDATIONS_PROMPT
+from tests.fakes import FakeLLM, SlowLLM
+
+
+def slow_call(calls: list, result="result", seconds=0.2):
+    def call():
+        calls.append(threading.current_thread().name)
+        time.sleep(seconds)
+        return result
+
+    return call
+
+
+def test_request_key_depends_on_all_parts():
+    assert get_request_key("gpt", "prompt", ["a"]) == get_request_key(
+        "gpt", "prompt", ["a"]
+    )
+    assert get_request_key("gpt", "prompt", ["a"]) != get_request_key(
+        "gpt", "prompt", ["b"]
+    )
+
+
+def test_concurrent_calls_share_one_flight():
+    flights = SingleFlight()
+    calls = []
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(
+            executor.map(lambda _: flights.call("key", slow_call(calls)), range(4))
+        )
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flights.report() == {"calls": 4, "coalesced": 3, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_again():
+    flights = SingleFlight()
+    calls = []
+
+    flights.call("a", slow_call(calls, seconds=0))
+    flights.call("b", slow_call(calls, seconds=0))
+    flights.call("a", slow_call(calls, seconds=0))
+
+    assert len(calls) == 3
+    assert flights.report()["coalesced"] == 0
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("provider error")
+
+    with ThreadPoolExecutor(3) as executor:
+        futures = [executor.submit(flights.call, "key", fail) for _ in range(3)]
+
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+    assert flights.report()["in_flight"] == 0
+
+
+def test_follower_gives_up_after_its_timeout():
+    flights = SingleFlight()
+    calls = []
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flights.call, "key", slow_call(calls, seconds=0.5))
+        time.sleep(0.05)
+        follower = executor.submit(flights.call, "key", slow_call(calls), 0.05)
+
+        with pytest.raises(TimeoutError):
+            follower.result()
+        assert leader.result() == "result"
+
+
+def test_async_callers_share_one_flight():
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flights.acall("key", call) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["result"] * 3
+    assert len(calls) == 1
+    assert flights.report()["coalesced"] == 2
+
+
+def test_async_caller_joins_sync_flight():
+    flights = SingleFlight()
+    calls = []
+
+    async def fail():
+        raise AssertionError("The async caller should join the running call")
+
+    with ThreadPoolExecutor(1) as executor:
+        leader = executor.submit(flights.call, "key", slow_call(calls))
+        time.sleep(0.05)
+        result = asyncio.run(flights.acall("key", fail))
+
+    assert result == leader.result() == "result"
+
+
+def test_disabled_runs_every_call():
+    flights = SingleFlight(enabled=False)
+    calls = []
+
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(lambda _: flights.call("key", slow_call(calls)), range(2)))
+
+    assert len(calls) == 2
+
+
+def test_invoke_structured_coalesces_identical_requests(monkeypatch):
+    response = {"recommendations": [], "summary": "No matches yet"}
+
+    llm = SlowLLM(0.2, response, response)
+    flights = SingleFlight()
+    monkeypatch.setattr(agent.tasks, "get_llm", lambda timeout=None: llm)
+    monkeypatch.setattr(agent.tasks, "COALESCER", flights)
+
+    def invoke(_):
+        return agent.tasks.invoke_structured(
+            JOB_RECOMMENDATIONS_PROMPT, current_profile_information="Age: 18"
+        )
+
+    with ThreadPoolExecutor(2) as executor:
+        results = list(executor.map(invoke, range(2)))
+
+    assert results[0] is results[1]
+    assert len(llm.calls) == 1
+    assert flights.report()["coalesced"] == 1
+
+
+def test_invoke_structured_follower_timeout_is_deadline(monkeypatch):
+    flights = SingleFlight()
+    monkeypatch.setattr(agent.tasks, "COALESCER", flights)
+    monkeypatch.setattr(agent.tasks, "get_llm", lambda timeout=None: FakeLLM())
+
+    def wait_too_long(key, call, timeout):
+        raise TimeoutError
+
+    monkeypatch.setattr(flights, "call", wait_too_long)
+
+    with pytest.raises(DeadlineExceeded):
+        agent.tasks.invoke_structured(
+            JOB_RECOMMENDATIONS_PROMPT, timeout=1, current_profile_information="Age: 18"
+        )
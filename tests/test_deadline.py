@@ -0,0 +1,121 @@
+import time
+
+import httpx
+from langchain_core.messages import AIMessage
+from openai import APITimeoutError, InternalServerError, RateLimitError
+
+import agent.tasks
+from agent.deadline import get_remaining_seconds, start_turn, with_deadline
+from agent.models import ProfileInformation
+from agent.prompts import PROFILE_INFORMATION_PROMPT
+from agent.tasks import (
+    extract_profile_information,
+    keep_job_recommendations,
+    keep_profile_information,
+    reuse_queued_questions,
+)
+from config import TURN_DEADLINE_SECONDS
+from tests.fakes import FlakyLLM
+
+
+def fail_node(state):
+    raise AssertionError("The node should not run after the deadline")
+
+
+def test_start_turn_sets_deadline_and_resets_degraded():
+    update = start_turn({"degraded": True})
+
+    assert update["degraded"] is False
+    assert 0 < get_remaining_seconds(update) <= TURN_DEADLINE_SECONDS
+
+
+def test_expired_deadline_skips_node():
+    node = with_deadline(fail_node, lambda state: {"messages": []})
+
+    update = node({"deadline": time.time() - 1})
+
+    assert update == {"messages": [], "degraded": True}
+
+
+def test_timed_out_llm_call_keeps_previous_profile(monkeypatch):
+    timeouts = []
+
+    def time_out(prompt, timeout=None, **variables):
+        timeouts.append(timeout)
+        raise APITimeoutError(request=httpx.Request("POST", "https://example.com"))
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", time_out)
+    node = with_deadline(extract_profile_information, keep_profile_information)
+
+    update = node({"messages": [], "interests": ["art"], "deadline": time.time() + 10})
+
+    assert 0 < timeouts[0] <= 10
+    assert update["degraded"] is True
+    assert "interests" not in update
+
+
+def get_provider_error(error_class, status: int):
+    request = httpx.Request("POST", "https://example.com")
+    return error_class(
+        "Provider error", response=httpx.Response(status, request=request), body=None
+    )
+
+
+def test_rate_limited_call_is_retried_within_the_deadline(monkeypatch):
+    llm = FlakyLLM(
+        [get_provider_error(RateLimitError, 429)],
+        {"age": 18, "is_profile_complete": False},
+    )
+    timeouts = []
+
+    def get_llm(timeout=None):
+        timeouts.append(timeout)
+        return llm
+
+    monkeypatch.setattr(agent.tasks, "get_llm", get_llm)
+    monkeypatch.setattr(agent.tasks, "RETRY_BACKOFF_SECONDS", 0)
+
+    parsed = agent.tasks.invoke_structured(
+        PROFILE_INFORMATION_PROMPT,
+        timeout=30,
+        user_input="I am 18",
+        current_profile_information="",
+    )
+
+    assert parsed == ProfileInformation(age=18, is_profile_complete=False)
+    assert len(llm.calls) == 2
+    assert timeouts[0] == 30
+    assert 0 < timeouts[1] < 30
+
+
+def test_unavailable_provider_keeps_previous_profile(monkeypatch):
+    def fail(prompt, timeout=None, **variables):
+        raise get_provider_error(InternalServerError, 503)
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fail)
+    node = with_deadline(extract_profile_information, keep_profile_information)
+
+    update = node({"messages": [], "interests": ["art"], "deadline": time.time() + 10})
+
+    assert update["degraded"] is True
+    assert "interests" not in update
+
+
+def test_degraded_profiling_serves_queued_question():
+    state = {
+        "messages": [],
+        "question_queue": [{"field": "age", "question": "How old are you?"}],
+    }
+
+    update = reuse_queued_questions(state)
+
+    assert update["messages"][0].content.endswith("How old are you?")
+
+
+def test_degraded_recommendations_keep_existing_records():
+    update = keep_job_recommendations(
+        {"messages": [AIMessage(content="Hi")], "job_recommendations": {"a": {}}}
+    )
+
+    assert "job_recommendations" not in update
+    assert "found so far" in update["messages"][0].content
@@ -0,0 +1,102 @@
+import agent.tasks
+from agent.education import (
+    build_match_query,
+    fill_education,
+    find_programmes,
+    get_education_index,
+)
+from agent.models import JobRecommendation, JobRecommendations
+from agent.prompts import INDEXED_EDUCATION_JOB_RECOMMENDATIONS_PROMPT
+from agent.tasks import get_job_recommendations
+
+
+def test_find_programmes_ranks_related_roles_first():
+    programmes = find_programmes("Software Developer")
+
+    assert programmes[0]["name"] == "BSc Computer Science"
+    assert len(programmes) <= 3
+
+
+def test_find_programmes_handles_unknown_and_empty_roles():
+    assert find_programmes("Astronaut") == []
+    assert find_programmes("and / or") == []
+    assert build_match_query('"near" OR (') == '"near"'
+
+
+def test_find_programmes_needs_the_role_in_related_roles():
+    # Each of these shares a word with an unrelated programme
+    assert find_programmes("UX Researcher") == []
+    assert [p["name"] for p in find_programmes("Marine Biologist")] == ["BSc Biology"]
+    assert "BA Architecture" in [p["name"] for p in find_programmes("Architect")]
+    assert "MSc Computer Science" not in [
+        p["name"] for p in find_programmes("Architect")
+    ]
+
+
+def test_index_loads_bundled_dataset():
+    assert len(get_education_index()) > 50
+
+
+def test_fill_education_overwrites_generated_education():
+    response = JobRecommendations(
+        recommendations=[
+            JobRecommendation(
+                job_role="Nurse",
+                job_role_description="Cares for patients",
+                education="Something the LLM made up",
+                profile_match="Caring",
+            )
+        ],
+        summary="Summary",
+    )
+
+    fill_education(response)
+
+    assert response.recommendations[0].education.startswith("Bachelor of Nursing")
+
+
+def test_fill_education_keeps_education_without_a_match():
+    response = JobRecommendations(
+        recommendations=[
+            JobRecommendation(
+                job_role="Astronaut",
+                job_role_description="Travels to space",
+                education="Pilot training",
+                profile_match="Adventurous",
+            )
+        ],
+        summary="Summary",
+    )
+
+    fill_education(response)
+
+    assert response.recommendations[0].education == "Pilot training"
+
+
+def test_get_job_recommendations_uses_indexed_education_prompt(monkeypatch):
+    prompts = []
+
+    def fake_invoke_structured(prompt, **variables):
+        prompts.append(prompt)
+        return JobRecommendations(
+            recommendations=[
+                JobRecommendation(
+                    job_role="Data Analyst",
+                    job_role_description="Analyses data",
+                    education=None,
+                    profile_match="Likes numbers",
+                )
+            ],
+            summary="Summary",
+        )
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fake_invoke_structured)
+    monkeypatch.setattr(agent.tasks, "EDUCATION_FROM_INDEX", True)
+    monkeypatch.setattr(agent.tasks, "RECOMMENDATION_CACHE_ENABLED", False)
+
+    result = get_job_recommendations({"messages": []})
+
+    assert prompts == [INDEXED_EDUCATION_JOB_RECOMMENDATIONS_PROMPT]
+    assert (
+        "BSc Data Science" in result["job_recommendations"]["data-analyst"]["education"]
+    )
@@ -0,0 +1,61 @@
+from langchain_core.messages import AIMessage
+
+from agent.event_log import (
+    EventLog,
+    TurnLogger,
+    get_state_delta,
+    iter_events,
+    list_event_files,
+    replay_session,
+    summarize_events,
+)
+
+
+def test_get_state_delta_keeps_only_changed_keys():
+    state = {"age": 30, "interests": ["art"], "messages": []}
+    update = {
+        "age": 30,
+        "interests": ["art", "music"],
+        "messages": [AIMessage(content="Hi")],
+    }
+
+    assert get_state_delta(state, update) == {
+        "interests": ["art", "music"],
+        "messages": [{"role": "assistant", "content": "Hi"}],
+    }
+
+
+def test_turns_are_logged_and_replayed(tmp_path):
+    event_log = EventLog(str(tmp_path))
+    for session_id in ("a", "b"):
+        turn_log = TurnLogger(session_id, {"age": None}, "I am 30", event_log)
+        turn_log.node("extract", {"age": 30, "messages": [AIMessage(content="Ok")]})
+        turn_log.node("ask", {"age": 30})
+        turn_log.end()
+    event_log.close()
+
+    events = list(iter_events(tmp_path, "a"))
+
+    assert [event["type"] for event in events] == ["turn", "node", "node", "end"]
+    assert events[2]["delta"] == {}
+    assert replay_session(iter(events)) == {
+        "age": 30,
+        "messages": [
+            {"role": "user", "content": "I am 30"},
+            {"role": "assistant", "content": "Ok"},
+        ],
+    }
+    summary = summarize_events(iter_events(tmp_path))
+    assert summary["sessions"] == 2
+    assert summary["turns"] == 2
+    assert summary["nodes"]["extract"]["calls"] == 2
+
+
+def test_event_files_are_rotated_and_pruned(tmp_path):
+    event_log = EventLog(str(tmp_path), max_bytes=100, max_files=2)
+    for i in range(10):
+        event_log.emit({"type": "turn", "session_id": "a", "user_input": "x" * 80})
+    event_log.close()
+
+    assert len(list_event_files(tmp_path)) == 2
+    assert len(list(iter_events(tmp_path))) == 2
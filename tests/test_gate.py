@@ -0,0 +1,89 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.gate import parse_age, parse_locality, screen_user_input
+from agent.graph import graph
+from tests.fakes import get_profiled_state
+
+
+def test_parse_age():
+    assert parse_age("I am 18 years old") == 18
+    assert parse_age("I'm 25") == 25
+    assert parse_age("I like math") is None
+
+
+def test_parse_locality():
+    assert parse_locality("I want to stay close to home") is True
+    assert parse_locality("I would love to work abroad") is False
+    assert parse_locality("I like math") is None
+
+
+def ask_about(state: dict, field: str) -> dict:
+    return {**state, "question_queue": [{"field": field, "question": "Tell me more"}]}
+
+
+def test_skips_small_talk_and_known_information():
+    assert screen_user_input(get_profiled_state("ok thanks")).skip_extraction
+    assert screen_user_input(
+        ask_about(get_profiled_state("I like math"), "interests")
+    ).skip_extraction
+    assert screen_user_input(get_profiled_state("I am 18")).skip_extraction
+
+
+def test_known_words_only_count_for_the_asked_field():
+    state = get_profiled_state("creative")
+
+    for field in ("desired_job_characteristics", "interests", "age"):
+        decision = screen_user_input(ask_about(state, field))
+        assert decision.reason == "new_information"
+    assert screen_user_input(
+        ask_about(state, "personal_characteristics")
+    ).skip_extraction
+
+
+def test_does_not_skip_new_information():
+    for message in [
+        "I am 19 years old",
+        "I want to work abroad",
+        "I am good at programming",
+        "no",
+    ]:
+        assert not screen_user_input(get_profiled_state(message)).skip_extraction
+
+
+def test_does_not_skip_before_first_extraction():
+    state = {"messages": [HumanMessage(content="ok")], "do_profiling": True}
+
+    assert not screen_user_input(state).skip_extraction
+
+
+def test_graph_reuses_questions_without_llm_call():
+    result = graph.invoke(get_profiled_state("thanks"))
+
+    assert result["llm_calls_avoided"] == 2
+    assert "locally or abroad" in result["messages"][-1].content
+
+
+def test_repeated_answer_to_a_new_question_is_not_skipped():
+    state = get_profiled_state()
+    state["messages"] += [
+        AIMessage(content="Would you like to work locally or abroad?"),
+        HumanMessage(content="yes"),
+        AIMessage(content="Do you enjoy working in a team?"),
+        HumanMessage(content="yes"),
+    ]
+
+    assert not screen_user_input(state).skip_extraction
+
+    # Answering the same question again adds nothing
+    state["messages"][-2] = AIMessage(
+        content="Would you like to work locally or abroad?"
+    )
+    assert screen_user_input(state).reason == "repeated_message"
+
+
+def test_graph_counts_user_messages():
+    result = graph.invoke({**get_profiled_state("thanks"), "user_message_count": 1})
+
+    assert result["user_message_count"] == 2
+    # The gate found nothing new, so the profile reflects the message
+    assert result["profiled_message_count"] == 2
@@ -0,0 +1,108 @@
+import asyncio
+
+from agent.hedging import RequestHedger, parse_hedged_nodes
+
+
+def make_calls(*delays):
+    """Async calls that take the given delays in order and record cancellation."""
+    delays = list(delays)
+    cancelled = []
+
+    def call():
+        delay = delays.pop(0)
+
+        async def run():
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        return run()
+
+    return call, cancelled
+
+
+def get_warm_hedger(budget: float = 1.0) -> RequestHedger:
+    hedger = RequestHedger({"get_job_recommendations": 0.9}, budget, min_samples=3)
+    hedger.latencies["get_job_recommendations"].extend([0.01] * 5)
+    return hedger
+
+
+def test_parse_hedged_nodes():
+    assert parse_hedged_nodes("a:0.95, b,") == {"a": 0.95, "b": 0.9}
+    assert parse_hedged_nodes("") == {}
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    hedger = get_warm_hedger()
+    call, cancelled = make_calls(5.0, 0.01)
+
+    discarded = []
+
+    result = hedger.invoke(
+        "get_job_recommendations_indexed_education", call, discarded.append
+    )
+
+    assert result == 0.01
+    assert discarded == []
+    assert hedger.report()["get_job_recommendations"]["fired"] == 1
+    assert hedger.report()["get_job_recommendations"]["won"] == 1
+    assert cancelled == [5.0]
+
+
+def test_loser_that_finished_together_is_passed_on():
+    hedger = get_warm_hedger()
+    finished = None
+    calls = []
+
+    def call():
+        nonlocal finished
+        calls.append(None)
+        if len(calls) == 1:
+
+            async def primary():
+                # Finishes as soon as the hedge does
+                await finished
+                return "primary"
+
+            finished = asyncio.get_running_loop().create_future()
+            return primary()
+
+        async def hedge():
+            finished.set_result(None)
+            return "hedge"
+
+        return hedge()
+
+    discarded = []
+
+    result = hedger.invoke("get_job_recommendations", call, discarded.append)
+
+    assert sorted([result, *discarded]) == ["hedge", "primary"]
+
+
+def test_budget_caps_hedges():
+    hedger = get_warm_hedger(budget=0.0)
+    call, _ = make_calls(0.1)
+
+    assert hedger.invoke("get_job_recommendations", call) == 0.1
+    assert hedger.report()["get_job_recommendations"]["fired"] == 0
+
+
+def test_no_hedging_before_enough_samples_or_without_policy():
+    hedger = RequestHedger({"get_job_recommendations": 0.9}, 1.0, min_samples=3)
+    call, _ = make_calls(0.05, 0.05)
+
+    hedger.invoke("get_job_recommendations", call)
+    hedger.invoke("extract_profile_information", call)
+
+    assert hedger.report() == {
+        "get_job_recommendations": {
+            "calls": 1,
+            "fired": 0,
+            "won": 0,
+            "threshold_seconds": None,
+        }
+    }
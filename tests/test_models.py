@@ -1,3 +1,4 @@
+from agent.models import JobRecommendation, JobRecommendations, get_compact_model
 from agent.tasks import ProfileInformation
 
 
@@ -25,3 +26,50 @@ def test_to_prompt_string():
         in prompt_string
     )
     assert "Is Profile Complete: True" in prompt_string
+
+
+def test_compact_prompt_string_leaves_out_empty_fields():
+    profile = ProfileInformation(age=25, interests=[], is_profile_complete=False)
+
+    assert profile.get_attribute_with_values(compact=True) == (
+        "Age: 25\nIs Profile Complete: False"
+    )
+    assert (
+        ProfileInformation(is_profile_complete=None).get_attribute_with_values(
+            compact=True
+        )
+        == "None"
+    )
+
+
+def test_compact_model_keeps_fields_with_short_descriptions():
+    compact = get_compact_model(JobRecommendations)
+
+    assert compact is get_compact_model(JobRecommendations)
+    assert issubclass(compact, JobRecommendations)
+    assert compact.__name__ == "JobRecommendations"
+    assert list(compact.model_fields) == list(JobRecommendations.model_fields)
+    assert '- "summary": Summary of the roles and the profile' in (
+        compact.get_field_descriptions()
+    )
+
+    # Nested records use the compact model too
+    result = compact.model_validate(
+        {
+            "recommendations": [
+                {
+                    "job_role": "Architect",
+                    "job_role_description": "Designs buildings",
+                    "education": None,
+                    "profile_match": "Math and art",
+                }
+            ],
+            "summary": None,
+        }
+    )
+    assert isinstance(result.recommendations[0], JobRecommendation)
+    schema = compact.model_json_schema()
+    assert (
+        "description"
+        not in schema["$defs"]["JobRecommendation"]["properties"]["job_role"]
+    )
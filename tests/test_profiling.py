@@ -0,0 +1,36 @@
+import json
+import time
+
+import profiling
+
+
+def busy_work():
+    deadline = time.perf_counter() + 0.05
+    data = []
+    while time.perf_counter() < deadline:
+        data.append(str(len(data)))
+    return data
+
+
+def test_profile_turn_is_noop_when_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "profile_dir", None)
+
+    with profiling.profile_turn("turn"):
+        busy_work()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_turn_writes_profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "profile_dir", str(tmp_path))
+
+    with profiling.profile_turn("turn"):
+        busy_work()
+
+    folded = next(tmp_path.glob("*.folded")).read_text()
+    summary = json.loads(next(tmp_path.glob("*.json")).read_text())
+
+    assert "busy_work" in folded
+    assert summary["samples"] > 0
+    assert summary["peak_traced_bytes"] > 0
+    assert next(tmp_path.glob("*.alloc.txt")).read_text()
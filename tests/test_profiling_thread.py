@@ -0,0 +1,102 @@
+import pytest
+
+import agent.tasks
+from agent.graph import (
+    end_profiling_thread,
+    get_profiling_thread_bytes,
+    get_thread_config,
+    has_profiling_thread,
+    profiling_graph,
+    resume_profiling_thread,
+    start_profiling_thread,
+    update_profiling_thread,
+)
+from tests.fakes import get_profiled_state
+
+
+def get_thread_state(thread_id: str) -> dict:
+    return profiling_graph.get_state(get_thread_config(thread_id)).values
+
+
+def test_thread_pauses_for_user_input():
+    start_profiling_thread("pause", get_profiled_state())
+
+    assert has_profiling_thread("pause")
+    assert not has_profiling_thread("unknown")
+
+
+def test_resume_adds_only_the_new_message():
+    start_profiling_thread("resume", get_profiled_state())
+
+    events = list(resume_profiling_thread("resume", "thanks"))
+
+    nodes = [node for event in events for node in event]
+    assert nodes == ["wait_for_user_input", "reuse_profile_questions"]
+    # The caller already has the user message, only the reply is returned
+    assert "messages" not in events[0]["wait_for_user_input"]
+    assert (
+        "locally or abroad"
+        in events[1]["reuse_profile_questions"]["messages"][0].content
+    )
+
+    state = get_thread_state("resume")
+    assert state["messages"][2].content == "thanks"
+    assert len(state["messages"]) == 4
+    # Paused again for the next turn
+    assert has_profiling_thread("resume")
+
+
+def test_profile_lists_are_replaced():
+    start_profiling_thread("lists", get_profiled_state())
+
+    # Extraction returns the full lists, so an update must not append to them
+    profiling_graph.update_state(get_thread_config("lists"), {"interests": ["math"]})
+
+    assert get_thread_state("lists")["interests"] == ["math"]
+
+
+def test_update_and_end_thread():
+    start_profiling_thread("update", get_profiled_state())
+
+    update_profiling_thread("update", {"job_recommendations": {"a": {"id": "a"}}})
+    assert get_thread_state("update")["job_recommendations"] == {"a": {"id": "a"}}
+
+    # Updating a thread that does not exist does not create one
+    update_profiling_thread("missing", {"job_recommendations": {}})
+    assert not has_profiling_thread("missing")
+
+    end_profiling_thread("update")
+    assert not has_profiling_thread("update")
+
+
+def test_failed_turn_is_not_resumed(monkeypatch):
+    def fail(prompt, **variables):
+        raise RuntimeError("Provider error")
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fail)
+    start_profiling_thread("failed", get_profiled_state())
+
+    with pytest.raises(RuntimeError):
+        list(resume_profiling_thread("failed", "I am 19 years old"))
+
+    # Stuck at the failed node, so the next message restarts the thread
+    assert not has_profiling_thread("failed")
+    start_profiling_thread("failed", get_profiled_state("I am 19 years old"))
+    events = list(resume_profiling_thread("failed", "thanks"))
+
+    assert "reuse_profile_questions" in events[-1]
+    assert get_thread_state("failed")["messages"][-2].content == "thanks"
+
+
+def test_thread_keeps_only_the_latest_checkpoint():
+    start_profiling_thread("pruned", get_profiled_state())
+    for content in ["thanks", "ok", "great"]:
+        list(resume_profiling_thread("pruned", content))
+
+    assert profiling_graph.checkpointer.count_checkpoints("pruned") == 1
+    assert get_profiling_thread_bytes("pruned") > 0
+    assert get_profiling_thread_bytes("unknown") == 0
+    # Still resumable from the pruned checkpoint
+    assert has_profiling_thread("pruned")
+    list(resume_profiling_thread("pruned", "cool"))
+    assert get_thread_state("pruned")["messages"][-2].content == "cool"
@@ -0,0 +1,79 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agent.prompt_size import measure_prompt_sizes
+from agent.prompting import PromptCacheStats, get_compact_prompt
+from agent.prompts import (
+    FOLLOW_UP_QUESTION_PROMPT,
+    JOB_RECOMMENDATIONS_PROMPT,
+    PROFILE_INFORMATION_PROMPT,
+)
+
+
+def test_system_prefix_is_identical_across_turns():
+    first = PROFILE_INFORMATION_PROMPT.format_messages(
+        user_input="User: I like math",
+        current_profile_information="Age: None",
+    )
+    second = PROFILE_INFORMATION_PROMPT.format_messages(
+        user_input="User: I like math\nUser: I am 18 years old",
+        current_profile_information="Age: 18",
+    )
+
+    assert isinstance(first[0], SystemMessage)
+    assert isinstance(first[1], HumanMessage)
+    assert first[0].content == second[0].content
+    assert first[1].content != second[1].content
+
+
+def test_system_prefix_contains_no_variable_content():
+    for prompt in [
+        PROFILE_INFORMATION_PROMPT,
+        FOLLOW_UP_QUESTION_PROMPT,
+        JOB_RECOMMENDATIONS_PROMPT,
+    ]:
+        assert "{" not in prompt.system_prefix
+        assert "Instructions:" in prompt.system_prefix
+        assert "Output Fields:" in prompt.system_prefix
+
+
+def test_cache_stats_summary():
+    stats = PromptCacheStats()
+    for cached in [0, 768]:
+        stats.record(
+            "get_job_recommendations",
+            AIMessage(
+                content="",
+                usage_metadata={
+                    "input_tokens": 1024,
+                    "output_tokens": 100,
+                    "total_tokens": 1124,
+                    "input_token_details": {"cache_read": cached},
+                },
+            ),
+        )
+
+    summary = stats.summary()["get_job_recommendations"]
+
+    assert summary["calls"] == 2
+    assert summary["cached_tokens"] == 768
+    assert summary["cache_ratio"] == 768 / 2048
+
+
+def test_compact_prompt_is_shorter_and_cached():
+    compact = get_compact_prompt(JOB_RECOMMENDATIONS_PROMPT)
+
+    assert compact is get_compact_prompt(JOB_RECOMMENDATIONS_PROMPT)
+    assert compact.name == JOB_RECOMMENDATIONS_PROMPT.name
+    assert len(compact.system_prefix) < len(JOB_RECOMMENDATIONS_PROMPT.system_prefix)
+
+
+def test_measure_prompt_sizes_reports_every_node():
+    rows = measure_prompt_sizes(lambda text: len(text.split()))
+
+    assert {row["node"] for row in rows} >= {
+        "extract_profile_information",
+        "ask_profile_questions",
+        "get_job_recommendations",
+        "get_more_job_recommendations",
+    }
+    assert all(row["compact_tokens"] < row["full_tokens"] for row in rows)
@@ -0,0 +1,81 @@
+import pytest
+
+import agent.tasks
+from agent.models import ProfileQuestion, ProfileQuestions
+from agent.tasks import ask_profile_questions
+
+QUEUE = [
+    {"field": "interests", "question": "What do you enjoy doing?"},
+    {"field": "age", "question": "How old are you?"},
+]
+
+ALL_FIELDS_BUT_INTERESTS_AND_AGE = {
+    "competencies": ["Python"],
+    "personal_characteristics": ["curious"],
+    "is_locally_focused": True,
+    "job_characteristics": ["remote"],
+}
+
+
+def fail_invoke_structured(prompt, **variables):
+    raise AssertionError("The LLM should not be called")
+
+
+def test_serves_next_question_from_queue(monkeypatch):
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fail_invoke_structured)
+    state = {
+        "messages": [],
+        **ALL_FIELDS_BUT_INTERESTS_AND_AGE,
+        "interests": ["music"],
+        "question_queue": QUEUE,
+    }
+
+    result = ask_profile_questions(state)
+
+    # The interests question is dropped once interests are filled
+    assert result["question_queue"] == QUEUE[1:]
+    assert result["profile_questions"] == ["How old are you?"]
+    assert "How old are you?" in result["messages"][0].content
+    assert result["llm_calls_avoided"] == 1
+
+
+def test_regenerates_when_a_missing_field_has_no_question(monkeypatch):
+    response = ProfileQuestions(
+        message="A few things are missing.",
+        questions=[
+            ProfileQuestion(field="age", question="How old are you?"),
+            ProfileQuestion(field="competencies", question="What are you good at?"),
+        ],
+    )
+    monkeypatch.setattr(
+        agent.tasks, "invoke_structured", lambda prompt, **variables: response
+    )
+    state = {
+        "messages": [],
+        **ALL_FIELDS_BUT_INTERESTS_AND_AGE,
+        "competencies": [],
+        "interests": ["music"],
+        "question_queue": QUEUE,
+    }
+
+    result = ask_profile_questions(state)
+
+    assert [q["field"] for q in result["question_queue"]] == ["age", "competencies"]
+    assert result["messages"][0].content == "A few things are missing."
+
+
+@pytest.mark.parametrize("queue", [None, []])
+def test_regenerates_when_queue_is_empty(monkeypatch, queue):
+    calls = []
+    monkeypatch.setattr(
+        agent.tasks,
+        "invoke_structured",
+        lambda prompt, **variables: (
+            calls.append(prompt)
+            or ProfileQuestions(message="Tell me more.", questions=[])
+        ),
+    )
+
+    ask_profile_questions({"messages": [], "question_queue": queue})
+
+    assert len(calls) == 1
@@ -0,0 +1,65 @@
+from agent.models import JobRecommendation, JobRecommendations, ProfileInformation
+from agent.recommendation_cache import RecommendationCache, fingerprint_profile
+
+
+def get_profile(**overrides) -> ProfileInformation:
+    values = {
+        "age": 18,
+        "interests": ["Math", "arts"],
+        "competencies": [],
+        "personal_characteristics": ["creative"],
+        "is_locally_focused": False,
+        "desired_job_characteristics": ["small business"],
+        "is_profile_complete": True,
+    }
+    return ProfileInformation(**{**values, **overrides})
+
+
+RECOMMENDATIONS = JobRecommendations(
+    recommendations=[
+        JobRecommendation(
+            job_role="Architect",
+            job_role_description="Designs buildings",
+            education=None,
+            profile_match="Math and art",
+        )
+    ],
+    summary="Summary",
+)
+
+
+def test_fingerprint_ignores_order_case_and_plurals():
+    assert fingerprint_profile(get_profile()) == fingerprint_profile(
+        get_profile(interests=["art ", "math"])
+    )
+    assert fingerprint_profile(get_profile()) != fingerprint_profile(
+        get_profile(age=30)
+    )
+
+
+def test_exact_hit_and_miss(tmp_path):
+    cache = RecommendationCache(path=str(tmp_path / "cache.db"))
+    cache.put(get_profile(), RECOMMENDATIONS)
+
+    assert cache.get(get_profile(interests=["ART", "Maths"])) == RECOMMENDATIONS
+    assert cache.get(get_profile(interests=["music"])) is None
+    assert cache.report()["hit_rate"] == 0.5
+
+
+def test_similarity_threshold(tmp_path):
+    cache = RecommendationCache(
+        path=str(tmp_path / "cache.db"), similarity_threshold=0.8
+    )
+    cache.put(get_profile(), RECOMMENDATIONS)
+
+    similar = get_profile(personal_characteristics=["creative", "social"])
+
+    assert cache.get(similar) == RECOMMENDATIONS
+    assert cache.report()["similar_hits"] == 1
+
+
+def test_stale_entries_are_not_served(tmp_path):
+    cache = RecommendationCache(path=str(tmp_path / "cache.db"), ttl_seconds=-1)
+    cache.put(get_profile(), RECOMMENDATIONS)
+
+    assert cache.get(get_profile()) is None
@@ -0,0 +1,215 @@
+from langchain_core.messages import HumanMessage
+
+import agent.tasks
+from agent.graph import more_job_recommendations, recommendation_graph
+from agent.models import JobRecommendation, JobRecommendations, ProfileInformation
+from agent.recommendation_cache import get_canonical_profile
+from agent.recommendations import diff_profiles, make_job_id, merge_recommendations
+from agent.tasks import (
+    get_current_profile_information,
+    get_job_recommendations,
+    get_more_job_recommendations,
+)
+from config import TURN_DEADLINE_SECONDS
+
+
+def get_recommendations(*job_roles: str) -> JobRecommendations:
+    return JobRecommendations(
+        recommendations=[
+            JobRecommendation(
+                job_role=job_role,
+                job_role_description=f"{job_role} description",
+                education=None,
+                profile_match=f"{job_role} match",
+            )
+            for job_role in job_roles
+        ],
+        summary="Summary",
+    )
+
+
+def test_make_job_id_is_stable():
+    assert make_job_id("UX / UI Designer") == "ux-ui-designer"
+    assert make_job_id("ux/ui designer ") == make_job_id("UX / UI Designer")
+
+
+def test_merge_recommendations_keeps_existing_records():
+    existing = merge_recommendations(None, get_recommendations("Data Analyst"))
+
+    merged = merge_recommendations(
+        existing, get_recommendations("data analyst", "Architect")
+    )
+
+    assert list(merged) == ["data-analyst", "architect"]
+    assert merged["data-analyst"] is existing["data-analyst"]
+    assert merged["architect"]["job_role"] == "Architect"
+
+
+def test_get_more_job_recommendations_excludes_shown_roles(monkeypatch):
+    calls = []
+
+    def fake_invoke_structured(prompt, **variables):
+        calls.append(variables)
+        return get_recommendations("Data Analyst", "Teacher")
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fake_invoke_structured)
+    state = {
+        "messages": [],
+        "job_recommendations": merge_recommendations(
+            None, get_recommendations("Data Analyst")
+        ),
+    }
+
+    result = get_more_job_recommendations(state)
+
+    assert calls[0]["shown_job_roles"] == "Data Analyst"
+    assert list(result["job_recommendations"]) == ["data-analyst", "teacher"]
+
+
+def test_more_job_recommendations_get_a_deadline(monkeypatch):
+    timeouts = []
+
+    def fake_invoke_structured(prompt, timeout=None, **variables):
+        timeouts.append(timeout)
+        return get_recommendations("Teacher")
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fake_invoke_structured)
+
+    more_job_recommendations({"messages": [], "job_recommendations": {}})
+
+    assert 0 < timeouts[0] <= TURN_DEADLINE_SECONDS
+
+
+def get_profile_state(interests: list[str], records: dict, snapshot: dict) -> dict:
+    return {
+        "messages": [],
+        "age": 25,
+        "interests": interests,
+        "job_recommendations": records,
+        "recommendation_profile": snapshot,
+    }
+
+
+def test_diff_profiles_reports_added_and_removed_values():
+    previous = {"age": 25, "interests": ["drawing", "music"]}
+    current = {"age": 25, "interests": ["music", "cooking"]}
+
+    assert diff_profiles(previous, current) == {
+        "interests": {"added": {"cooking"}, "removed": {"drawing"}}
+    }
+
+
+def test_changed_interest_replaces_only_stale_roles(monkeypatch):
+    calls = []
+
+    def fake_invoke_structured(prompt, **variables):
+        calls.append(variables)
+        return get_recommendations("Chef")
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fake_invoke_structured)
+    records = merge_recommendations(
+        None,
+        JobRecommendations(
+            recommendations=[
+                JobRecommendation(
+                    job_role="Illustrator",
+                    job_role_description="Creates drawings",
+                    education=None,
+                    profile_match="Fits your interest in drawing",
+                ),
+                JobRecommendation(
+                    job_role="Music Teacher",
+                    job_role_description="Teaches music",
+                    education=None,
+                    profile_match="Fits your interest in music",
+                ),
+            ],
+            summary="Summary",
+        ),
+    )
+    snapshot = get_canonical_profile(
+        get_current_profile_information(
+            get_profile_state(["Drawing", "Music"], records, None)
+        )
+    )
+
+    result = get_job_recommendations(
+        get_profile_state(["Music", "Cooking"], records, snapshot)
+    )
+
+    assert calls[0]["count"] == 1
+    assert calls[0]["shown_job_roles"] == "Illustrator\nMusic Teacher"
+    assert list(result["job_recommendations"]) == ["music-teacher", "chef"]
+    assert result["job_recommendations"]["music-teacher"] is records["music-teacher"]
+
+
+def test_unchanged_profile_reuses_recommendations(monkeypatch):
+    monkeypatch.setattr(agent.tasks, "invoke_structured", None)
+    records = merge_recommendations(None, get_recommendations("Data Analyst"))
+    state = get_profile_state(["Numbers"], records, None)
+    state["recommendation_profile"] = get_canonical_profile(
+        get_current_profile_information(state)
+    )
+
+    result = get_job_recommendations(state)
+
+    assert result["job_recommendations"] == records
+    assert result["llm_calls_avoided"] == 1
+
+
+def test_added_value_alone_keeps_recommendations(monkeypatch):
+    monkeypatch.setattr(agent.tasks, "invoke_structured", None)
+    records = merge_recommendations(None, get_recommendations("Data Analyst"))
+    state = get_profile_state(["Numbers"], records, None)
+    state["recommendation_profile"] = get_canonical_profile(
+        get_current_profile_information(state)
+    )
+    state["interests"] = ["Numbers", "Statistics"]
+
+    result = get_job_recommendations(state)
+
+    assert result["job_recommendations"] == records
+
+
+def test_entering_recommendations_skips_extraction_without_new_input(monkeypatch):
+    monkeypatch.setattr(agent.tasks, "invoke_structured", None)
+    records = merge_recommendations(None, get_recommendations("Data Analyst"))
+    state = get_profile_state(["Numbers"], records, None)
+    state["recommendation_profile"] = get_canonical_profile(
+        get_current_profile_information(state)
+    )
+    state["messages"] = [HumanMessage(content="I like numbers")]
+    state["user_message_count"] = state["profiled_message_count"] = 1
+
+    nodes = [node for event in recommendation_graph.stream(state) for node in event]
+
+    assert nodes == ["start_turn", "get_job_recommendations"]
+
+
+def test_entering_recommendations_extracts_new_input_first(monkeypatch):
+    def fake_invoke_structured(prompt, **variables):
+        if prompt.output_model is ProfileInformation:
+            # Incomplete, which would send the user back to profiling in a turn
+            return ProfileInformation(
+                interests=["Numbers", "Cooking"], is_profile_complete=False
+            )
+        return get_recommendations("Chef")
+
+    monkeypatch.setattr(agent.tasks, "invoke_structured", fake_invoke_structured)
+    monkeypatch.setattr(agent.tasks, "RECOMMENDATION_CACHE_ENABLED", False)
+    state = get_profile_state(["Numbers"], None, None)
+    # The same answer twice in a row is still a new message
+    state["messages"] = [
+        HumanMessage(content="I also like cooking"),
+        HumanMessage(content="I also like cooking"),
+    ]
+    state["user_message_count"] = 2
+    state["profiled_message_count"] = 1
+    state["do_profiling"] = False
+
+    result = recommendation_graph.invoke(state)
+
+    assert result["interests"] == ["Numbers", "Cooking"]
+    assert result["profiled_message_count"] == 2
+    assert result["do_profiling"] is False
+    assert list(result["job_recommendations"]) == ["chef"]
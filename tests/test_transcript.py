@@ -0,0 +1,58 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.tasks import MAX_PROFILE_LIST_ITEMS, bound_profile_list
+from agent.transcript import MessageRecord, MessageStore, get_deep_size
+
+
+def test_window_is_bounded_and_older_messages_are_archived(tmp_path):
+    store = MessageStore(archive_dir=tmp_path, window_size=3)
+    for i in range(5):
+        store.append("session", "user" if i % 2 == 0 else "assistant", f"m{i}")
+
+    messages = store.to_messages("session")
+
+    assert [m.content for m in messages] == ["m2", "m3", "m4"]
+    assert isinstance(messages[0], HumanMessage)
+    assert isinstance(messages[1], AIMessage)
+    assert [r.content for r in store.iter_history("session")] == [
+        "m0",
+        "m1",
+        "m2",
+        "m3",
+        "m4",
+    ]
+
+
+def test_release_idle_moves_sessions_out_of_memory(tmp_path):
+    store = MessageStore(archive_dir=tmp_path, window_size=3, idle_seconds=0)
+    store.append("session", "user", "hello")
+
+    assert store.release_idle() == ["session"]
+    assert store.memory_report() == {}
+
+    # The window is restored on next use
+    assert [m.content for m in store.to_messages("session")] == ["hello"]
+    assert store.memory_report()["session"] > 0
+
+
+def test_deep_size_counts_nested_records():
+    records = {"data-analyst": {"job_role": "Data Analyst", "education": "x" * 1000}}
+
+    assert (
+        get_deep_size({"job_recommendations": records})
+        > get_deep_size({"job_recommendations": {}}) + 1000
+    )
+    assert get_deep_size([AIMessage(content="x" * 1000)]) > 1000
+
+
+def test_message_record_has_no_instance_dict():
+    assert not hasattr(MessageRecord("user", "hi"), "__dict__")
+
+
+def test_bound_profile_list():
+    values = ["Math", "math ", "Art"] + [f"item {i}" for i in range(30)]
+
+    bounded = bound_profile_list(values)
+
+    assert bounded[:2] == ["Math", "Art"]
+    assert len(bounded) == MAX_PROFILE_LIST_ITEMS
@@ -0,0 +1,129 @@
+import pytest
+
+import agent.tasks
+from agent.deadline import DeadlineExceeded
+from agent.models import JobRecommendations, ProfileInformation
+from agent.prompts import JOB_RECOMMENDATIONS_PROMPT
+from agent.validation import get_repair_model, partial_validate
+from tests.fakes import FakeLLM, SlowLLM
+
+
+def test_partial_validate_keeps_valid_fields_and_records():
+    valid, invalid = partial_validate(
+        JobRecommendations,
+        {
+            "recommendations": [
+                {
+                    "job_role": "Architect",
+                    "job_role_description": "Designs buildings",
+                    "education": None,
+                    "profile_match": "Math and art",
+                },
+                {"job_role": "Broken record"},
+            ],
+        },
+    )
+
+    assert [r.job_role for r in valid["recommendations"]] == ["Architect"]
+    assert invalid == ["summary"]
+
+
+def test_missing_optional_fields_are_not_repaired():
+    valid, invalid = partial_validate(
+        ProfileInformation, {"age": 18, "is_profile_complete": False}
+    )
+
+    assert valid == {"age": 18, "is_profile_complete": False}
+    assert invalid == []
+
+
+def test_repair_model_is_cached_per_field_set():
+    first = get_repair_model(JobRecommendations, ("summary",))
+
+    assert first is get_repair_model(JobRecommendations, ("summary",))
+    assert list(first.model_fields) == ["summary"]
+
+
+def test_invoke_structured_re_requests_only_invalid_fields(monkeypatch):
+    llm = FakeLLM(
+        {
+            "recommendations": [
+                {
+                    "job_role": "Architect",
+                    "job_role_description": "Designs buildings",
+                    "education": None,
+                    "profile_match": "Math and art",
+                }
+            ],
+            "summary": 42,
+        },
+        {"summary": "A creative profile"},
+    )
+    monkeypatch.setattr(agent.tasks, "get_llm", lambda timeout=None: llm)
+
+    result = agent.tasks.invoke_structured(
+        JOB_RECOMMENDATIONS_PROMPT, current_profile_information="Age: 18"
+    )
+
+    assert result.summary == "A creative profile"
+    assert result.recommendations[0].job_role == "Architect"
+    assert list(llm.calls[1][0].model_fields) == ["summary"]
+
+
+def test_repair_prompt_is_smaller_than_the_request(monkeypatch):
+    llm = FakeLLM(INVALID_SUMMARY, {"summary": "A creative profile"})
+    monkeypatch.setattr(agent.tasks, "get_llm", lambda timeout=None: llm)
+
+    agent.tasks.invoke_structured(
+        JOB_RECOMMENDATIONS_PROMPT, current_profile_information="Age: 18"
+    )
+
+    (_, request), (_, repair) = llm.calls
+    repair_text = "\n".join(message.content for message in repair)
+    assert "Age: 18" in repair_text
+    assert request[0].content not in repair_text
+    assert len(repair_text) < sum(len(message.content) for message in request)
+
+
+INVALID_SUMMARY = {
+    "recommendations": [
+        {
+            "job_role": "Architect",
+            "job_role_description": "Designs buildings",
+            "education": None,
+            "profile_match": "Math and art",
+        }
+    ],
+    "summary": 42,
+}
+
+
+def test_repair_gets_only_the_remaining_timeout(monkeypatch):
+    llm = FakeLLM(INVALID_SUMMARY, {"summary": "A creative profile"})
+    timeouts = []
+
+    def get_llm(timeout=None):
+        timeouts.append(timeout)
+        return llm
+
+    monkeypatch.setattr(agent.tasks, "get_llm", get_llm)
+
+    agent.tasks.invoke_structured(
+        JOB_RECOMMENDATIONS_PROMPT, timeout=30, current_profile_information="Age: 18"
+    )
+
+    assert timeouts[0] == 30
+    assert 0 < timeouts[1] < 30
+
+
+def test_repair_is_skipped_after_the_deadline(monkeypatch):
+    llm = SlowLLM(0.05, INVALID_SUMMARY, {"summary": "A creative profile"})
+    monkeypatch.setattr(agent.tasks, "get_llm", lambda timeout=None: llm)
+
+    with pytest.raises(DeadlineExceeded):
+        agent.tasks.invoke_structured(
+            JOB_RECOMMENDATIONS_PROMPT,
+            timeout=0.01,
+            current_profile_information="Age: 18",
+        )
+    assert len(llm.calls) == 1